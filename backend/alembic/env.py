@@ -0,0 +1,42 @@
+from logging.config import fileConfig
+
+from alembic import context
+from app.db.base import Base, engine, IS_SQLITE, SQLALCHEMY_DATABASE_URL
+# Import des modèles : leurs tables sont enregistrées dans Base.metadata (autogenerate)
+from app.models import card, dictionary, document  # noqa: F401
+
+config = context.config
+
+# Pas de reconfiguration des logs quand les migrations sont lancées depuis l'application
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Génère le SQL des migrations sans se connecter (alembic upgrade head --sql)."""
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=IS_SQLITE,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Applique les migrations avec le moteur synchrone de l'API (même URL, mêmes pragmas SQLite)."""
+    with engine.connect() as connection:
+        # SQLite ne sait pas modifier une colonne en place : ALTER en mode batch (copie de table)
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=IS_SQLITE)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,74 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 20:36:39.968917
+
+Tables de la version d'origine (create_all sur user_cards, card_contexts, dictionary).
+Une base créée avant les migrations est marquée à cette révision par app.db.init_db.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('dictionary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kanji', sa.String(), nullable=True),
+    sa.Column('reading', sa.String(), nullable=True),
+    sa.Column('definitions', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dictionary_id'), 'dictionary', ['id'], unique=False)
+    op.create_index(op.f('ix_dictionary_kanji'), 'dictionary', ['kanji'], unique=False)
+    op.create_index(op.f('ix_dictionary_reading'), 'dictionary', ['reading'], unique=False)
+    op.create_table('user_cards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('word_text', sa.String(), nullable=True),
+    sa.Column('reading', sa.String(), nullable=True),
+    sa.Column('lemma', sa.String(), nullable=True),
+    sa.Column('definition', sa.Text(), nullable=True),
+    sa.Column('pitch_accent', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('interval', sa.Integer(), nullable=True),
+    sa.Column('ease_factor', sa.Float(), nullable=True),
+    sa.Column('next_review_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('last_review_date', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_cards_id'), 'user_cards', ['id'], unique=False)
+    op.create_index(op.f('ix_user_cards_user_id'), 'user_cards', ['user_id'], unique=False)
+    op.create_index(op.f('ix_user_cards_word_text'), 'user_cards', ['word_text'], unique=False)
+    op.create_table('card_contexts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('card_id', sa.Integer(), nullable=True),
+    sa.Column('sentence_text', sa.Text(), nullable=False),
+    sa.Column('source_text_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['card_id'], ['user_cards.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_card_contexts_id'), 'card_contexts', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_card_contexts_id'), table_name='card_contexts')
+    op.drop_table('card_contexts')
+    op.drop_index(op.f('ix_user_cards_word_text'), table_name='user_cards')
+    op.drop_index(op.f('ix_user_cards_user_id'), table_name='user_cards')
+    op.drop_index(op.f('ix_user_cards_id'), table_name='user_cards')
+    op.drop_table('user_cards')
+    op.drop_index(op.f('ix_dictionary_reading'), table_name='dictionary')
+    op.drop_index(op.f('ix_dictionary_kanji'), table_name='dictionary')
+    op.drop_index(op.f('ix_dictionary_id'), table_name='dictionary')
+    op.drop_table('dictionary')
@@ -0,0 +1,53 @@
+"""dictionary natural key and imported banks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 22:10:00.000000
+
+Import idempotent (scripts/import_jmdict.py) : colonne sequence, clé naturelle
+(kanji, reading, sequence) et table dictionary_banks pour --changed-only.
+Les lignes importées avant cette révision n'ont pas de numéro de séquence : la clé
+naturelle ne les retrouverait jamais et chaque mot existerait deux fois après le prochain
+import (la ligne ancienne, de plus petite id, l'emportant aux recherches). La table est
+une donnée dérivée des term_bank : ces lignes sont supprimées, l'import suivant la remplit.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import has_column, has_table, has_unique
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_unique('dictionary', 'uq_dictionary_natural_key'):
+        if not has_column('dictionary', 'sequence'):
+            op.add_column('dictionary', sa.Column('sequence', sa.Integer(), nullable=True))
+        op.execute("DELETE FROM dictionary WHERE sequence IS NULL")
+        # SQLite ne sait pas ajouter une contrainte : batch recrée la table (copie)
+        with op.batch_alter_table('dictionary') as batch_op:
+            batch_op.create_unique_constraint('uq_dictionary_natural_key', ['kanji', 'reading', 'sequence'])
+    if not has_table('dictionary_banks'):
+        op.create_table('dictionary_banks',
+        sa.Column('file_name', sa.String(), nullable=False),
+        sa.Column('checksum', sa.String(length=64), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=True),
+        sa.Column('last_key', sa.Text(), nullable=True),
+        sa.Column('imported_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('file_name')
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('dictionary_banks')
+    with op.batch_alter_table('dictionary') as batch_op:
+        batch_op.drop_constraint('uq_dictionary_natural_key', type_='unique')
+        batch_op.drop_column('sequence')
@@ -0,0 +1,30 @@
+"""user_cards (user_id, lemma) index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 22:11:00.000000
+
+Statut des lemmes d'un texte (services/known_words.py).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index('ix_user_cards_user_lemma', 'user_cards', ['user_id', 'lemma'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_cards_user_lemma', table_name='user_cards')
@@ -0,0 +1,33 @@
+"""review queue indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 22:12:00.000000
+
+File de révision paginée par échéance et première phrase de contexte par carte
+(services/review_queue.py).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index('ix_user_cards_user_due', 'user_cards', ['user_id', 'next_review_date'], unique=False)
+    create_index(op.f('ix_card_contexts_card_id'), 'card_contexts', ['card_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_card_contexts_card_id'), table_name='card_contexts')
+    op.drop_index('ix_user_cards_user_due', table_name='user_cards')
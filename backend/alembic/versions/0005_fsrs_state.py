@@ -0,0 +1,35 @@
+"""FSRS card state
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 22:13:00.000000
+
+Stabilité et difficulté FSRS (services/scheduler.py), NULL tant que la carte n'a été
+révisée qu'avec SM-2.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import has_column
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for column in ('stability', 'difficulty'):
+        if not has_column('user_cards', column):
+            op.add_column('user_cards', sa.Column(column, sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_cards') as batch_op:
+        batch_op.drop_column('difficulty')
+        batch_op.drop_column('stability')
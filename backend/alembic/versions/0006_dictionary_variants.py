@@ -0,0 +1,41 @@
+"""dictionary variants
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 22:14:00.000000
+
+Graphies de recherche des entrées (services/kana.py). La table est remplie par
+python -m scripts.import_jmdict --variants-only ; vide, l'index du dictionnaire le signale.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index, has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('dictionary_variants'):
+        op.create_table('dictionary_variants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('variant', sa.String(), nullable=False),
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('priority', sa.SmallInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['entry_id'], ['dictionary.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+    create_index('ix_dictionary_variants_lookup', 'dictionary_variants', ['variant', 'priority', 'entry_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dictionary_variants_lookup', table_name='dictionary_variants')
+    op.drop_table('dictionary_variants')
@@ -0,0 +1,88 @@
+"""stored documents
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 22:15:00.000000
+
+Documents analysés une fois (services/documents.py) et clé étrangère
+card_contexts.source_text_id -> documents. Aucun document n'existait avant : les
+source_text_id déjà renseignés ne pointent vers rien et sont remis à NULL.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import create_index, has_foreign_key, has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table('documents'):
+        op.create_table('documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('token_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('analyzed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    create_index(op.f('ix_documents_id'), 'documents', ['id'], unique=False)
+    create_index(op.f('ix_documents_user_id'), 'documents', ['user_id'], unique=False)
+    if not has_table('lemmas'):
+        op.create_table('lemmas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('text', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('text')
+        )
+    if not has_table('document_tokens'):
+        op.create_table('document_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('start_offset', sa.Integer(), nullable=False),
+        sa.Column('end_offset', sa.Integer(), nullable=False),
+        sa.Column('lemma_id', sa.Integer(), nullable=False),
+        sa.Column('entry_id', sa.Integer(), nullable=True),
+        sa.Column('reading', sa.String(), nullable=True),
+        sa.Column('part_of_speech', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['entry_id'], ['dictionary.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['lemma_id'], ['lemmas.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    create_index('ix_document_tokens_document_start', 'document_tokens', ['document_id', 'start_offset'], unique=False)
+    create_index('ix_document_tokens_lemma', 'document_tokens', ['lemma_id', 'document_id'], unique=False)
+    if not has_foreign_key('card_contexts', 'source_text_id', 'documents'):
+        op.execute(
+            "UPDATE card_contexts SET source_text_id = NULL "
+            "WHERE source_text_id NOT IN (SELECT id FROM documents)"
+        )
+        with op.batch_alter_table('card_contexts') as batch_op:
+            batch_op.create_foreign_key(
+                'fk_card_contexts_source_text_id_documents', 'documents',
+                ['source_text_id'], ['id'], ondelete='SET NULL',
+            )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('card_contexts') as batch_op:
+        batch_op.drop_constraint('fk_card_contexts_source_text_id_documents', type_='foreignkey')
+    op.drop_index('ix_document_tokens_lemma', table_name='document_tokens')
+    op.drop_index('ix_document_tokens_document_start', table_name='document_tokens')
+    op.drop_table('document_tokens')
+    op.drop_table('lemmas')
+    op.drop_index(op.f('ix_documents_user_id'), table_name='documents')
+    op.drop_index(op.f('ix_documents_id'), table_name='documents')
+    op.drop_table('documents')
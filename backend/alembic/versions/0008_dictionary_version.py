@@ -0,0 +1,35 @@
+"""dictionary version
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 23:40:00.000000
+
+Numéro de version du dictionnaire, incrémenté par scripts/import_jmdict.py. Chaque
+worker de l'API le consulte périodiquement et reconstruit son index s'il a changé.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table = op.create_table('dictionary_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(table, [{'id': 1, 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('dictionary_version')
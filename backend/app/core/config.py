@@ -0,0 +1,61 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Configuration de l'API, surchargeable par variables d'environnement ou fichier .env."""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Base de données (URL asynchrone) : sqlite+aiosqlite en local, postgresql+psycopg en production
+    database_url: str = "sqlite+aiosqlite:///./japanese_app.db"
+    # Pool de connexions PostgreSQL (ignoré pour SQLite)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    sqlite_busy_timeout_ms: int = 5000
+
+    # Index du dictionnaire chargé en mémoire au démarrage
+    dictionary_index_enabled: bool = True
+    dictionary_cache_size: int = 20000
+    # Nombre maximal de tokens adjacents fusionnés en un composé (前向き + 推論), 1 pour désactiver
+    dictionary_compound_span: int = 4
+    # URL appelée par scripts/import_jmdict.py pour reconstruire l'index de l'API (un seul worker)
+    dictionary_reload_url: str | None = None
+    # Intervalle de vérification de la version du dictionnaire par chaque worker (0 : désactivé)
+    dictionary_version_poll_seconds: float = 30.0
+
+    # Cache des tokens Sudachi, indexé par le hash du texte, borné par sa taille mémoire
+    # (par worker ; ~300 octets par token) et, en garde-fou, par son nombre d'entrées (0 : désactivé)
+    token_cache_max_mb: int = 64
+    token_cache_size: int = 4096
+    # Fichier de persistance du cache entre deux redémarrages (désactivé si vide)
+    token_cache_path: str | None = None
+
+    # Pool de processus de tokenisation (0 : tokenisation dans le processus de l'API)
+    tokenizer_workers: int = 2
+    # Nombre maximal de morceaux de texte en attente avant de refuser les requêtes (503)
+    tokenizer_max_pending: int = 64
+    # Taille visée des morceaux envoyés aux workers, découpés aux fins de phrase
+    tokenizer_chunk_chars: int = 2000
+
+    # Taille des groupes de phrases émis par /api/test-nlp/stream
+    stream_chunk_chars: int = 300
+
+    # Statuts des mots connus gardés en mémoire par utilisateur. L'invalidation est locale
+    # au processus : avec plusieurs workers uvicorn, une écriture servie par un autre worker
+    # n'est vue qu'après expiration du cache (en secondes, 0 : pas d'expiration, un seul worker).
+    known_words_cache: bool = True
+    known_words_cache_ttl: float = 10.0
+
+    # Pagination de la file de révision
+    review_page_size: int = 50
+    review_page_max: int = 500
+    # Avance tolérée de l'horloge du client sur reviewed_at ; au-delà, le résultat est rejeté
+    review_clock_skew_seconds: int = 300
+
+    # Moteur de planification des révisions : "sm2" (historique) ou "fsrs"
+    scheduler: str = "sm2"
+
+
+settings = Settings()
@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# Préfixe des métriques exposées au format Prometheus
+PREFIX = "japanese_app_"
+
+# Compteur de requêtes SQL de la requête HTTP en cours (None hors requête)
+_request_queries: ContextVar = ContextVar("request_queries", default=None)
+
+
+class Timing:
+    """Valeurs observées (durées en secondes) : cumuls depuis le démarrage et quantiles sur une fenêtre glissante."""
+
+    def __init__(self, window: int = 1000):
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            values = sorted(self._recent)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+        }
+
+
+class Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _display_name(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{key}={value}" for key, value in labels) + "}"
+
+
+def _prometheus_labels(labels, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """Registre des métriques du serveur, exposé par GET /api/stats et GET /metrics."""
+
+    def __init__(self):
+        self._timings = {}
+        self._summaries = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _get(self, registry: dict, factory, name: str, labels: dict):
+        key = (name, _labels(labels))
+        with self._lock:
+            if key not in registry:
+                registry[key] = factory()
+            return registry[key]
+
+    def timing(self, name: str, **labels) -> Timing:
+        """Durées en secondes (exposées avec le suffixe _seconds)."""
+        return self._get(self._timings, Timing, name, labels)
+
+    def summary(self, name: str, **labels) -> Timing:
+        """Valeurs sans unité observées par requête (ex. nombre de requêtes SQL)."""
+        return self._get(self._summaries, Timing, name, labels)
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(self._counters, Counter, name, labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Mesure la durée du bloc, `await` compris : `with metrics.timer("analysis_stage", stage="lookup"):`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, **labels).observe(time.perf_counter() - start)
+
+    def clear(self):
+        with self._lock:
+            self._timings.clear()
+            self._summaries.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = dict(self._timings)
+            summaries = dict(self._summaries)
+        return {
+            _display_name(name, labels): timing.stats()
+            for (name, labels), timing in list(timings.items()) + list(summaries.items())
+        }
+
+    def counters(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {_display_name(name, labels): counter.value for (name, labels), counter in counters.items()}
+
+    def render_prometheus(self, gauges: dict) -> str:
+        """
+        Texte au format d'exposition Prometheus (version 0.0.4).
+
+        Les durées et valeurs observées sont des summaries (quantiles 0.5 / 0.95 sur la fenêtre
+        glissante, _sum et _count cumulés) ; `gauges` ({nom: valeur}) vient des stats des services.
+        """
+        with self._lock:
+            timings = sorted(self._timings.items())
+            summaries = sorted(self._summaries.items())
+            counters = sorted(self._counters.items())
+
+        lines, declared = [], set()
+
+        def declare(metric, kind):
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for registry, suffix in ((timings, "_seconds"), (summaries, "")):
+            for (name, labels), timing in registry:
+                metric = PREFIX + name + suffix
+                declare(metric, "summary")
+                for q in (0.5, 0.95):
+                    lines.append(f"{metric}{_prometheus_labels(labels, quantile=q)} {timing.quantile(q)}")
+                lines.append(f"{metric}_sum{_prometheus_labels(labels)} {timing.total}")
+                lines.append(f"{metric}_count{_prometheus_labels(labels)} {timing.count}")
+        for (name, labels), counter in counters:
+            metric = PREFIX + name + "_total"
+            declare(metric, "counter")
+            lines.append(f"{metric}{_prometheus_labels(labels)} {counter.value}")
+        for name, value in sorted(gauges.items()):
+            metric = PREFIX + name
+            declare(metric, "gauge")
+            lines.append(f"{metric} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def flatten_stats(stats: dict, prefix: str = "") -> dict:
+    """Aplatit les stats des services ({"dictionary": {"cache": {"hits": 3}}}) en jauges numériques."""
+    gauges = {}
+    for key, value in stats.items():
+        name = f"{prefix}_{key}" if prefix else key
+        if isinstance(value, dict):
+            gauges.update(flatten_stats(value, name))
+        elif isinstance(value, (bool, int, float)):
+            gauges[name] = value
+    return gauges
+
+
+def count_queries(engine):
+    """Compte chaque requête SQL du moteur, au total et pour la requête HTTP en cours."""
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.counter("sql_queries").inc()
+        current = _request_queries.get()
+        if current is not None:
+            current[0] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware ASGI : durée, statut et nombre de requêtes SQL de chaque requête HTTP,
+    agrégés par route (le modèle de chemin, pas le chemin réel, pour borner les séries).
+    Le nombre de requêtes SQL est aussi renvoyé dans l'en-tête X-SQL-Queries.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self._routes = routes
+        self._paths = None
+
+    def _route(self, scope) -> str:
+        if self._paths is None:
+            self._paths = {route.endpoint: route.path for route in self._routes if hasattr(route, "endpoint")}
+        return self._paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        queries = [0]
+        token = _request_queries.set(queries)
+        status = [500]
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                # Requêtes d'une réponse en flux : seules celles faites avant l'envoi des en-têtes
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-queries", str(queries[0]).encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            route = self._route(scope)
+            metrics.timing("http_request", method=scope["method"], route=route).observe(time.perf_counter() - start)
+            metrics.summary("http_request_sql_queries", route=route).observe(queries[0])
+            metrics.counter("http_requests", method=scope["method"], route=route, status=status[0]).inc()
+
+
+metrics = Metrics()
@@ -1,15 +1,51 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from ..core.config import settings
 
-# Utilisation de SQLite pour le développement local
-SQLALCHEMY_DATABASE_URL = "sqlite:///./japanese_app.db"
+# URL asynchrone utilisée par l'API (SQLite via aiosqlite en développement local,
+# PostgreSQL via psycopg 3 en production : postgresql+psycopg://...)
+ASYNC_DATABASE_URL = make_url(settings.database_url)
+IS_SQLITE = ASYNC_DATABASE_URL.get_backend_name() == "sqlite"
 
-# L'argument connect_args={"check_same_thread": False} est spécifique à SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Variante synchrone pour les scripts (import, init) : psycopg 3 sait faire les deux
+SQLALCHEMY_DATABASE_URL = ASYNC_DATABASE_URL.set(drivername="sqlite") if IS_SQLITE else ASYNC_DATABASE_URL
+
+
+def _engine_options():
+    if IS_SQLITE:
+        # L'argument connect_args={"check_same_thread": False} est spécifique à SQLite
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL : les lecteurs ne sont plus bloqués par un écrivain (create_card, révisions...)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options())
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options())
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False : pas de rechargement implicite (impossible en async) après un commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
@@ -1,11 +1,55 @@
-from .base import Base, engine
-# IMPORT IMPORTANT :
-from ..models.card import UserCard, CardContext
-from ..models.dictionary import DictionaryEntry 
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from .base import engine
+
+# backend/alembic.ini, quel que soit le dossier courant
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+# Révision des tables d'origine (alembic/versions/0001_baseline.py), créées par create_all
+BASELINE_REVISION = "0001"
+BASELINE_TABLES = {"user_cards", "card_contexts", "dictionary"}
+
+
+def alembic_config(configure_logger: bool = True) -> Config:
+    config = Config(os.path.abspath(ALEMBIC_INI))
+    config.attributes["configure_logger"] = configure_logger
+    return config
+
 
 def init_models():
-    Base.metadata.create_all(bind=engine)
-    print("Tables créées : user_cards, card_contexts, dictionary")
+    """
+    Met le schéma à la dernière révision (alembic upgrade head).
+
+    Une base créée avant les migrations (par create_all au démarrage de l'API) n'a pas
+    de table alembic_version : si elle contient les tables d'origine, elle est marquée à
+    la révision de base puis mise à jour. create_all ne modifiait pas les tables existantes :
+    chaque révision vérifie ce qui est déjà en place et n'ajoute que ce qui manque.
+    """
+    config = alembic_config()
+    with engine.connect() as conn:
+        tables = set(inspect(conn).get_table_names())
+    if tables and "alembic_version" not in tables:
+        missing = BASELINE_TABLES - tables
+        if missing:
+            raise RuntimeError(f"Base créée avant les migrations, tables manquantes : {', '.join(sorted(missing))}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+    print(f"Schéma à jour (révision {ScriptDirectory.from_config(config).get_current_head()})")
+
+
+def check_schema():
+    """Lève une erreur si la base n'est pas à la dernière révision des migrations."""
+    head = ScriptDirectory.from_config(alembic_config(configure_logger=False)).get_current_head()
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    if current != head:
+        raise RuntimeError(f"Schéma à la révision {current}, attendu {head} : lancer python -m app.db.init_db")
+
 
 if __name__ == "__main__":
     init_models()
@@ -0,0 +1,46 @@
+from alembic import context, op
+from sqlalchemy import inspect
+
+# Aides pour les révisions alembic. Les bases antérieures aux migrations ont été tenues à
+# jour par create_all, qui crée les tables manquantes mais ne modifie jamais une table
+# existante : une même révision peut donc trouver son changement déjà fait, en partie ou
+# en totalité. Chaque opération vérifie d'abord l'état réel de la base. En mode hors
+# ligne (alembic upgrade --sql, PostgreSQL : le mode batch de SQLite exige une connexion),
+# rien n'est inspectable : tout le SQL est émis.
+
+
+def _inspector():
+    return None if context.is_offline_mode() else inspect(op.get_bind())
+
+
+def has_table(table: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and inspector.has_table(table)
+
+
+def has_column(table: str, column: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and any(c["name"] == column for c in inspector.get_columns(table))
+
+
+def has_index(table: str, index: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and any(i["name"] == index for i in inspector.get_indexes(table))
+
+
+def has_unique(table: str, constraint: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and any(u["name"] == constraint for u in inspector.get_unique_constraints(table))
+
+
+def has_foreign_key(table: str, column: str, referred_table: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and any(
+        fk["referred_table"] == referred_table and fk["constrained_columns"] == [column]
+        for fk in inspector.get_foreign_keys(table)
+    )
+
+
+def create_index(index: str, table: str, columns: list, **kw):
+    if not has_index(table, index):
+        op.create_index(index, table, columns, **kw)
@@ -0,0 +1,15 @@
+# Aides communes aux requêtes des services.
+
+# SQLite limite le nombre de paramètres liés par requête (999 sur les anciennes versions)
+CHUNK_SIZE = 500
+
+
+def chunks(items, size: int = CHUNK_SIZE):
+    """Tranches successives d'une liste, de `size` éléments au plus (une requête par tranche)."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def owner_filter(column, user_id):
+    """Condition de propriété : `user_id` None désigne les données sans propriétaire."""
+    return column.is_(None) if user_id is None else column == user_id
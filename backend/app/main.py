@@ -1,25 +1,77 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Literal
+import json
 import logging
+import time
 
 # Imports de nos modules locaux
-from .db.base import SessionLocal, engine
-from .db.init_db import init_models
+from .db.base import AsyncSessionLocal, engine, async_engine
+from .db.init_db import check_schema
+from .core.config import settings
+from .core.metrics import metrics, count_queries, flatten_stats, RequestMetricsMiddleware
 from .models.card import UserCard, CardContext
-from .models.dictionary import DictionaryEntry
-from .services.srs_algorithm import calculate_next_review
-from sudachipy import tokenizer, dictionary
+from .models.document import Document
+from .services.scheduler import get_scheduler
+from .services.dictionary_index import dictionary_index
+from .services.tokenization import tokenize_text_async, token_cache, tokenizer_pool, warm_up_tokenizer
+from .services.tokenizer_pool import TokenizerBusy
+from .services.analysis import annotate_tokens, iter_analysis_batches
+from .services.known_words import known_words
+from .services.warmup import warmup
+from .services.review_queue import fetch_review_page
+from .services.review_submission import apply_review_batch, load_card_states
+from .services.documents import analyze_document, document_tokens, list_documents, lemma_contexts, resume_documents, stop_resumed, UNFINISHED
 
-# Initialisation
-init_models()
-app = FastAPI(title="Japanese Reader API")
+# Moteur de planification SRS (SM-2 ou FSRS), choisi par configuration
+scheduler = get_scheduler(settings.scheduler)
 
-# Configuration du Tokenizer Japonais
-tokenizer_obj = dictionary.Dictionary().create()
-mode = tokenizer.Tokenizer.SplitMode.A
+async def build_dictionary_index():
+    # Construit dans un processus à part : le worker ne reçoit que l'index compacté
+    await dictionary_index.build_in_subprocess()
+    logging.info("Index du dictionnaire chargé : %s", dictionary_index.stats())
+
+async def load_dictionary_index():
+    if settings.dictionary_index_enabled:
+        await build_dictionary_index()
+
+# Préchauffage après le démarrage (étapes en parallèle) : le schéma est vérifié, pas créé
+warmup.step("schema", lambda: run_in_threadpool(check_schema))
+warmup.step("tokenizer", warm_up_tokenizer)
+warmup.step("dictionary_index", load_dictionary_index)
+warmup.step("documents", resume_documents)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Démarrage léger : le serveur répond dès maintenant, /ready attend la fin du préchauffage
+    if settings.token_cache_path:
+        token_cache.load(settings.token_cache_path)
+    tokenizer_pool.start()
+    warmup.start()
+    if settings.dictionary_index_enabled and settings.dictionary_version_poll_seconds > 0:
+        dictionary_index.watch(settings.dictionary_version_poll_seconds)
+    yield
+    await dictionary_index.stop_watch()
+    await warmup.stop()
+    await stop_resumed()
+    tokenizer_pool.shutdown()
+    if settings.token_cache_path:
+        token_cache.save(settings.token_cache_path)
+    await async_engine.dispose()
+
+app = FastAPI(title="Japanese Reader API", lifespan=lifespan)
+
+# Instrumentation : requêtes SQL comptées sur les deux moteurs, durée et SQL par route
+count_queries(engine)
+count_queries(async_engine.sync_engine)
+app.add_middleware(RequestMetricsMiddleware, routes=app.routes)
 
 # Middleware CORS
 app.add_middleware(
@@ -34,20 +86,27 @@ app.add_middleware(
 class TextRequest(BaseModel):
     text: str
 
+class ReviewResult(BaseModel):
+    card_id: int
+    quality: Literal["forgot", "hard", "easy"]
+    reviewed_at: datetime
+
 class CardCreate(BaseModel):
     word_text: str
     reading: str
     lemma: str
     definition: str
     sentence_context: str
+    document_id: int | None = None # Document d'où vient la phrase, s'il est enregistré
 
-# Dépendance DB
-def get_db():
-    db = SessionLocal()
-    try:
+class DocumentCreate(BaseModel):
+    title: str
+    text: str
+
+# Dépendance DB : une session asynchrone par requête, prise dans le pool du moteur
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # --- ROUTES ---
 
@@ -55,44 +114,98 @@ def get_db():
 def read_root():
     return {"status": "online"}
 
+@app.get("/ready")
+def read_ready():
+    # Sonde de disponibilité : 503 tant que le préchauffage n'est pas terminé (ou a échoué)
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+def service_stats():
+    return {
+        "dictionary": dictionary_index.stats(),
+        "token_cache": token_cache.stats(),
+        "tokenizer_pool": tokenizer_pool.stats(),
+        "known_words": known_words.stats(),
+        "warmup": warmup.stats(),
+    }
+
+@app.get("/api/stats")
+def read_stats():
+    return {
+        **service_stats(),
+        "timings": metrics.snapshot(),
+        "counters": metrics.counters(),
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    # Format texte Prometheus : summaries, compteurs, et stats des services en jauges
+    body = metrics.render_prometheus(flatten_stats(service_stats()))
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+@app.post("/api/dictionary/reload")
+def reload_dictionary(background_tasks: BackgroundTasks):
+    # Appelé par scripts/import_jmdict.py après un import : l'ancien index sert jusqu'au remplacement.
+    # Seul le worker qui reçoit la requête reconstruit ; les autres suivent la version en base.
+    if not settings.dictionary_index_enabled:
+        raise HTTPException(status_code=409, detail="Index du dictionnaire désactivé")
+    background_tasks.add_task(build_dictionary_index)
+    return {"message": "Reconstruction de l'index lancée"}
+
 @app.post("/api/test-nlp")
-def test_japanese_analysis(request: TextRequest, db: Session = Depends(get_db)):
+async def test_japanese_analysis(request: TextRequest, db: AsyncSession = Depends(get_db)):
     try:
-        tokens = tokenizer_obj.tokenize(request.text, mode)
-        results = []
-
-        # Récupérer tous les lemmes déjà enregistrés par l'utilisateur pour comparer
-        # (Plus tard, on filtrera par user_id)
-        known_words = {card.lemma: card.status for card in db.query(UserCard).all()}
-
-        for t in tokens:
-            lemma = t.dictionary_form()
-
-            # Déterminer le statut
-            # 0: Nouveau (Bleu), 1: En apprentissage (Jaune), 2: Connu (Blanc/Transparent)
-            status = "new"
-            if lemma in known_words:
-                status = known_words[lemma] # sera 'learning' ou 'mastered'
-
-            # Recherche de la définition
-            dict_entry = db.query(DictionaryEntry).filter(
-                (DictionaryEntry.kanji == lemma) | (DictionaryEntry.reading == lemma)
-            ).first()
-
-            results.append({
-                "surface": t.surface(),
-                "dictionary_form": lemma,
-                "reading": t.reading_form(),
-                "part_of_speech": t.part_of_speech(),
-                "definition": dict_entry.definitions if dict_entry else "No definition found",
-                "status": status
-            })
-        return {"tokens": results}
+        # Tokens mis en cache par hash du texte ; statut et définitions sont recalculés
+        with metrics.timer("analysis_stage", stage="tokenize"):
+            tokens = await tokenize_text_async(request.text)
+        results = await annotate_tokens(db, tokens)
+        with metrics.timer("analysis_stage", stage="serialize"):
+            body = json.dumps({"tokens": results}, ensure_ascii=False)
+        return Response(body, media_type="application/json")
+    except TokenizerBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _encode_event(stream_format: str, event: str, payload: dict) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+@app.post("/api/test-nlp/stream")
+async def stream_japanese_analysis(request: TextRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    """Même analyse que /api/test-nlp, émise par groupes de phrases (NDJSON ou server-sent events)."""
+    started = time.perf_counter()
+
+    async def generate():
+        # Session ouverte dans le générateur : celle de get_db serait fermée avant la fin du flux
+        db = AsyncSessionLocal()
+        count = 0
+        try:
+            async for batch in iter_analysis_batches(db, request.text, settings.stream_chunk_chars):
+                if not batch:
+                    continue
+                if count == 0:
+                    metrics.timing("analysis_stream_time_to_first_token").observe(time.perf_counter() - started)
+                count += len(batch)
+                with metrics.timer("analysis_stage", stage="serialize"):
+                    event = _encode_event(format, "tokens", {"tokens": batch})
+                yield event
+            yield _encode_event(format, "done", {"done": True, "count": count})
+        except Exception as e:
+            # Les en-têtes sont déjà partis : l'erreur est signalée dans le flux
+            logging.exception("Erreur pendant l'analyse en flux")
+            yield _encode_event(format, "error", {"error": str(e)})
+        finally:
+            await db.close()
+            metrics.timing("analysis_stream_duration").observe(time.perf_counter() - started)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type)
+
 @app.post("/api/cards")
-def create_card(card_data: CardCreate, db: Session = Depends(get_db)):
+async def create_card(card_data: CardCreate, db: AsyncSession = Depends(get_db)):
     new_card = UserCard(
         word_text=card_data.word_text,
         reading=card_data.reading,
@@ -101,44 +214,68 @@ def create_card(card_data: CardCreate, db: Session = Depends(get_db)):
         next_review_date=datetime.now()
     )
     db.add(new_card)
-    db.flush()
-    new_context = CardContext(card_id=new_card.id, sentence_text=card_data.sentence_context)
+    await db.flush()
+    new_context = CardContext(
+        card_id=new_card.id, sentence_text=card_data.sentence_context, source_text_id=card_data.document_id
+    )
     db.add(new_context)
-    db.commit()
+    await db.commit()
+    known_words.invalidate(card_data.lemma)
     return {"id": new_card.id}
 
 @app.get("/api/reviews")
-def get_reviews(db: Session = Depends(get_db)):
-    now = datetime.now()
-    reviews = db.query(UserCard).filter(UserCard.next_review_date <= now).all()
-    results = []
-    for card in reviews:
-        context = db.query(CardContext).filter(CardContext.card_id == card.id).first()
-        results.append({
-            "id": card.id,
-            "word_text": card.word_text,
-            "reading": card.reading,
-            "definition": card.definition,
-            "context_sentence": context.sentence_text if context else ""
-        })
-    return results
+async def get_reviews(
+    limit: int = Query(settings.review_page_size, ge=1, le=settings.review_page_max),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        items, next_cursor = await fetch_review_page(db, datetime.now(), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.post("/api/reviews/batch")
+async def submit_reviews(reviews: list[ReviewResult], db: AsyncSession = Depends(get_db)):
+    # Déclarée avant /api/reviews/{card_id} pour que "batch" ne soit pas pris pour un id
+    return await apply_review_batch(db, reviews, scheduler)
 
 @app.post("/api/reviews/{card_id}")
-def update_card_srs(card_id: int, quality: str, db: Session = Depends(get_db)):
-    card = db.query(UserCard).filter(UserCard.id == card_id).first()
+async def update_card_srs(card_id: int, quality: Literal["forgot", "hard", "easy"], db: AsyncSession = Depends(get_db)):
+    card = await db.get(UserCard, card_id)
     if not card: raise HTTPException(status_code=404)
-    # Note: Assurez-vous que calculate_next_review est bien importé
-    new_interval, new_ease, next_date = calculate_next_review(card.interval, card.ease_factor, quality)
-    card.interval = new_interval
-    card.ease_factor = new_ease
-    card.next_review_date = next_date
-    db.commit()
-    return {"next_review": next_date}
+    # Même chemin que les lots : le moteur configuré calcule le nouvel état
+    await apply_review_batch(db, [ReviewResult(card_id=card_id, quality=quality, reviewed_at=datetime.now())], scheduler)
+    await db.refresh(card)
+    return {"next_review": card.next_review_date}
+
+@app.get("/api/scheduler/simulate")
+async def simulate_reviews(
+    days: int = Query(30, ge=1, le=3650),
+    scheduler_name: str | None = Query(None, alias="engine"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Charge de révision projetée par jour pour tout le deck, sans rien modifier."""
+    try:
+        simulator = get_scheduler(scheduler_name) if scheduler_name else scheduler
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    now = datetime.now()
+    _, states = await load_card_states(db, now)
+    started = time.perf_counter()
+    # Calcul NumPy de plusieurs centaines de ms sur un gros deck : hors de la boucle d'événements
+    daily_reviews = await run_in_threadpool(simulator.simulate, states, days, now)
+    return {
+        "engine": simulator.name,
+        "cards": len(states),
+        "daily_reviews": daily_reviews.tolist(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
 
 @app.post("/api/cards/mark-known")
-def mark_word_known(card_data: CardCreate, db: Session = Depends(get_db)):
+async def mark_word_known(card_data: CardCreate, db: AsyncSession = Depends(get_db)):
     # On vérifie si la carte existe déjà
-    existing = db.query(UserCard).filter(UserCard.lemma == card_data.lemma).first()
+    existing = await db.scalar(select(UserCard).where(UserCard.lemma == card_data.lemma).limit(1))
     if existing:
         existing.status = "mastered"
     else:
@@ -151,5 +288,49 @@ def mark_word_known(card_data: CardCreate, db: Session = Depends(get_db)):
             next_review_date=datetime(2099, 1, 1) # Très loin dans le futur
         )
         db.add(new_card)
-    db.commit()
+    await db.commit()
+    known_words.invalidate(card_data.lemma)
     return {"message": "Mot marqué comme connu"}
+
+@app.post("/api/documents", status_code=202)
+async def create_document(document_data: DocumentCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    # Analyse complète une seule fois, après la réponse ; les lectures suivantes ne re-tokenisent rien
+    document = Document(title=document_data.title, text=document_data.text, status="pending")
+    db.add(document)
+    await db.commit()
+    background_tasks.add_task(analyze_document, document.id)
+    return {"id": document.id, "status": document.status}
+
+@app.post("/api/documents/{document_id}/retry", status_code=202)
+async def retry_document(document_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    # Document en échec, ou bloqué parce que le worker qui l'analysait s'est arrêté
+    document = await db.get(Document, document_id)
+    if not document: raise HTTPException(status_code=404)
+    if document.status not in (*UNFINISHED, "failed"):
+        raise HTTPException(status_code=409, detail=f"Document déjà analysé ({document.status})")
+    background_tasks.add_task(analyze_document, document.id)
+    return {"id": document.id, "status": document.status}
+
+@app.get("/api/documents")
+async def get_documents(db: AsyncSession = Depends(get_db)):
+    return await list_documents(db)
+
+@app.get("/api/documents/{document_id}")
+async def get_document(document_id: int, db: AsyncSession = Depends(get_db)):
+    document = await db.get(Document, document_id)
+    if not document: raise HTTPException(status_code=404)
+    # Seul le statut de l'utilisateur est recalculé ; les tokens viennent de document_tokens
+    tokens = await document_tokens(db, document) if document.status == "ready" else []
+    return {
+        "id": document.id,
+        "title": document.title,
+        "status": document.status,
+        "error": document.error,
+        "created_at": document.created_at,
+        "analyzed_at": document.analyzed_at,
+        "tokens": tokens,
+    }
+
+@app.get("/api/lemmas/{lemma}/contexts")
+async def get_lemma_contexts(lemma: str, limit: int = Query(50, ge=1, le=500), db: AsyncSession = Depends(get_db)):
+    return {"lemma": lemma, "contexts": await lemma_contexts(db, lemma, limit)}
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.base import Base
 
 class UserCard(Base):
     __tablename__ = "user_cards"
+    __table_args__ = (
+        # Recherche du statut des lemmes d'un texte (known_words)
+        Index("ix_user_cards_user_lemma", "user_id", "lemma"),
+        # File de révision paginée par échéance (review_queue)
+        Index("ix_user_cards_user_due", "user_id", "next_review_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True) # Sera lié à l'User plus tard
@@ -20,6 +26,9 @@ class UserCard(Base):
     status = Column(String, default="learning") # learning, mastered, ignored
     interval = Column(Integer, default=1)       # En jours
     ease_factor = Column(Float, default=2.5)    # Facteur multiplicateur (SM-2)
+    # Colonnes FSRS ajoutées aux bases existantes par la migration 0005 (python -m app.db.init_db)
+    stability = Column(Float, nullable=True)    # Stabilité en jours (FSRS)
+    difficulty = Column(Float, nullable=True)   # Difficulté de 1 à 10 (FSRS)
     next_review_date = Column(DateTime(timezone=True), server_default=func.now())
     last_review_date = Column(DateTime(timezone=True), nullable=True)
     
@@ -30,11 +39,11 @@ class CardContext(Base):
     __tablename__ = "card_contexts"
 
     id = Column(Integer, primary_key=True, index=True)
-    card_id = Column(Integer, ForeignKey("user_cards.id"))
+    card_id = Column(Integer, ForeignKey("user_cards.id"), index=True)
     
     # La phrase complète
     sentence_text = Column(Text, nullable=False)
     # Optionnel : ID du texte d'origine pour y revenir si besoin
-    source_text_id = Column(Integer, nullable=True) 
+    source_text_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
 
     card = relationship("UserCard", back_populates="contexts")
@@ -1,10 +1,44 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
 from ..db.base import Base
 
 class DictionaryEntry(Base):
     __tablename__ = "dictionary"
+    # Clé naturelle utilisée par l'import pour rendre les ré-imports idempotents
+    __table_args__ = (UniqueConstraint("kanji", "reading", "sequence", name="uq_dictionary_natural_key"),)
 
     id = Column(Integer, primary_key=True, index=True)
     kanji = Column(String, index=True)    # ex: 食べる
     reading = Column(String, index=True)  # ex: たべる
+    sequence = Column(Integer, nullable=True) # Numéro de séquence JMdict (index 6 du term_bank)
     definitions = Column(Text)            # JSON ou texte long (manger, to eat)
+
+class DictionaryVariant(Base):
+    __tablename__ = "dictionary_variants"
+    # Index couvrant : une recherche est un seul parcours d'index, déjà trié par priorité
+    __table_args__ = (Index("ix_dictionary_variants_lookup", "variant", "priority", "entry_id"),)
+
+    # Graphies sous lesquelles une entrée peut être cherchée, calculées à l'import
+    id = Column(Integer, primary_key=True)
+    variant = Column(String, nullable=False)      # ex: 食べる, たべる, タベル
+    entry_id = Column(Integer, ForeignKey("dictionary.id", ondelete="CASCADE"), nullable=False)
+    priority = Column(SmallInteger, nullable=False) # 0 kanji, 1 lecture, 2-3 formes normalisées
+
+class DictionaryBank(Base):
+    __tablename__ = "dictionary_banks"
+
+    # Un enregistrement par fichier term_bank importé (pour --changed-only)
+    file_name = Column(String, primary_key=True)
+    checksum = Column(String(64), nullable=False)   # sha256 du fichier
+    entries = Column(Integer, default=0)
+    last_key = Column(Text, nullable=True)          # Clé naturelle (JSON) de la dernière entrée
+    imported_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class DictionaryVersion(Base):
+    __tablename__ = "dictionary_version"
+
+    # Une seule ligne, incrémentée par chaque import : les workers de l'API qui voient
+    # la valeur changer reconstruisent leur index (services/dictionary_index.py)
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True) # Sera lié à l'User plus tard
+    title = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+
+    # Analyse faite une seule fois, en tâche de fond : pending, processing, ready, failed
+    status = Column(String, default="pending")
+    error = Column(Text, nullable=True)
+    token_count = Column(Integer, default=0)    # Mots stockés (ponctuation et blancs exclus)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    analyzed_at = Column(DateTime(timezone=True), nullable=True)
+
+    tokens = relationship("DocumentToken", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+
+class Lemma(Base):
+    __tablename__ = "lemmas"
+
+    # Forme du dictionnaire stockée une fois, référencée par id dans document_tokens
+    id = Column(Integer, primary_key=True)
+    text = Column(String, unique=True, nullable=False) # ex: 食べる
+
+class DocumentToken(Base):
+    __tablename__ = "document_tokens"
+    __table_args__ = (
+        # Relecture d'un document dans l'ordre du texte
+        Index("ix_document_tokens_document_start", "document_id", "start_offset"),
+        # Tous les contextes d'un lemme
+        Index("ix_document_tokens_lemma", "lemma_id", "document_id"),
+    )
+
+    # Un mot du texte (composés fusionnés) ; la surface est text[start_offset:end_offset]
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    start_offset = Column(Integer, nullable=False)
+    end_offset = Column(Integer, nullable=False)
+    lemma_id = Column(Integer, ForeignKey("lemmas.id"), nullable=False)
+    entry_id = Column(Integer, ForeignKey("dictionary.id", ondelete="SET NULL"), nullable=True)
+    reading = Column(String)                     # ex: タベ
+    part_of_speech = Column(String)              # Champs POS de Sudachi séparés par des virgules
+
+    document = relationship("Document", back_populates="tokens")
@@ -0,0 +1,65 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..core.metrics import metrics
+from .dictionary_lookup import match_tokens, NO_DEFINITION
+from .known_words import known_words
+from .tokenizer_pool import chunk_text, chunk_tokens
+from .tokenization import tokenize_text_async, token_cache
+
+
+async def annotate_tokens(db: AsyncSession, tokens, user_id=None):
+    """
+    Ajoute définition et statut de l'utilisateur aux tokens (surface, lemme, lecture, POS).
+
+    Les tokens adjacents qui forment une entrée du dictionnaire sont fusionnés en un seul mot
+    (surface et lecture concaténées, POS du dernier token).
+    """
+    # Recherche groupée des définitions : une recherche par graphie au lieu d'une requête par token
+    with metrics.timer("analysis_stage", stage="lookup"):
+        words = await match_tokens(db, tokens, settings.dictionary_compound_span)
+    # Statut des seuls lemmes présents dans le texte (plus tard, on filtrera par user_id)
+    with metrics.timer("analysis_stage", stage="known_words"):
+        statuses = await known_words.statuses(db, [lemma for _, _, lemma, _, _ in words], user_id)
+
+    results = []
+    for start, end, lemma, _, definition in words:
+        span = tokens[start:end]
+        # Déterminer le statut
+        # 0: Nouveau (Bleu), 1: En apprentissage (Jaune), 2: Connu (Blanc/Transparent)
+        status = "new"
+        if lemma in statuses:
+            status = statuses[lemma] # sera 'learning' ou 'mastered'
+
+        results.append({
+            "surface": "".join(surface for surface, _, _, _ in span),
+            "dictionary_form": lemma,
+            "reading": "".join(reading for _, _, reading, _ in span),
+            "part_of_speech": span[-1][3],
+            "definition": definition if definition is not None else NO_DEFINITION,
+            "status": status
+        })
+    return results
+
+
+async def iter_analysis_batches(db: AsyncSession, text: str, chunk_chars: int, user_id=None):
+    """
+    Analyse le texte par groupes de phrases et produit un lot de tokens annotés par groupe.
+
+    Les morceaux ne passent pas par le cache de tokens (il serait rempli de phrases isolées) ;
+    le texte complet y est ajouté à la fin pour que la prochaine analyse soit immédiate.
+    Les tokens en cache sont regroupés de la même façon, aux fins de phrase : un composé
+    n'est jamais coupé entre deux lots.
+    """
+    cached = token_cache.get(text)
+    if cached is not None:
+        for tokens in chunk_tokens(cached, chunk_chars):
+            yield await annotate_tokens(db, tokens, user_id)
+        return
+
+    all_tokens = []
+    for chunk in chunk_text(text, chunk_chars):
+        with metrics.timer("analysis_stage", stage="tokenize"):
+            tokens = await tokenize_text_async(chunk, cache=False)
+        all_tokens.extend(tokens)
+        yield await annotate_tokens(db, tokens, user_id)
+    token_cache.put(text, all_tokens)
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..db.base import async_engine
+from ..models.dictionary import DictionaryEntry, DictionaryVariant, DictionaryVersion
+from .lru_cache import LRUCache
+
+
+class _PackedKeys:
+    """
+    Clés triées stockées dans un seul bloc UTF-8 (avec offsets) plutôt qu'une liste de str.
+    L'ordre des octets UTF-8 est celui des points de code : on compare les bytes sans décoder.
+    """
+
+    def __init__(self, mapping: dict):
+        keys = sorted(k.encode("utf-8") for k in mapping)
+        self.blob = b"".join(keys)
+        self.offsets = array("I", [0])
+        self.values = array("I")
+        for key in keys:
+            self.offsets.append(self.offsets[-1] + len(key))
+            self.values.append(mapping[key.decode("utf-8")])
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def find(self, key: str):
+        raw = key.encode("utf-8")
+        i = bisect_left(self, raw)
+        if i < len(self.values) and self[i] == raw:
+            return self.values[i]
+        return None
+
+    def has_prefix(self, prefix: str) -> bool:
+        """Vrai si au moins une clé commence par `prefix` (la première clé >= prefix suffit)."""
+        raw = prefix.encode("utf-8")
+        i = bisect_left(self, raw)
+        return i < len(self.values) and self[i].startswith(raw)
+
+    def nbytes(self) -> int:
+        return len(self.blob) + self.offsets.itemsize * len(self.offsets) + self.values.itemsize * len(self.values)
+
+
+class _Snapshot:
+    """Index figé : remplacé d'un bloc à chaque reconstruction, jamais modifié en place."""
+
+    def __init__(self, variants: _PackedKeys, definitions: bytes, offsets: array, entry_ids: array, version: int):
+        self.variants = variants
+        self.definitions = definitions
+        self.offsets = offsets
+        self.entry_ids = entry_ids
+        self.entries = len(entry_ids)
+        # Version du dictionnaire lue avant les données : un import concurrent la fait changer
+        self.version = version
+
+    def nbytes(self) -> int:
+        return (
+            self.variants.nbytes()
+            + len(self.definitions) + self.offsets.itemsize * len(self.offsets)
+            + self.entry_ids.itemsize * len(self.entry_ids)
+        )
+
+
+def build_snapshot(conn) -> _Snapshot:
+    """Construit un snapshot de l'index depuis une connexion SQLAlchemy (Core, sans ORM)."""
+    version = read_version(conn)
+
+    # 1. Meilleure entrée par graphie : plus petite (priorité, id), sans tri côté SQL
+    best = {}
+    rows = conn.execute(
+        select(DictionaryVariant.variant, DictionaryVariant.priority, DictionaryVariant.entry_id)
+        .execution_options(yield_per=10000)
+    )
+    for variant, priority, entry_id in rows:
+        current = best.get(variant)
+        if current is None or (priority, entry_id) < current:
+            best[variant] = (priority, entry_id)
+    if not best and conn.execute(select(DictionaryEntry.id).limit(1)).first() is not None:
+        logging.warning("Table dictionary_variants vide : lancer python -m scripts.import_jmdict --variants-only")
+
+    # 2. Définitions des seules entrées retenues, compactées dans l'ordre des id
+    needed = {entry_id for _, entry_id in best.values()}
+    positions, chunks, offsets, entry_ids = {}, [], array("Q", [0]), array("I")
+    rows = conn.execute(
+        select(DictionaryEntry.id, DictionaryEntry.definitions)
+        .order_by(DictionaryEntry.id)
+        .execution_options(yield_per=10000)
+    )
+    for entry_id, definitions in rows:
+        if entry_id in needed:
+            data = (definitions or "").encode("utf-8")
+            chunks.append(data)
+            offsets.append(offsets[-1] + len(data))
+            positions[entry_id] = len(positions)
+            entry_ids.append(entry_id)
+    variant_map = {variant: positions[entry_id] for variant, (_, entry_id) in best.items()}
+    return _Snapshot(_PackedKeys(variant_map), b"".join(chunks), offsets, entry_ids, version)
+
+
+def read_version(conn) -> int:
+    """Version du dictionnaire en base (incrémentée par scripts/import_jmdict.py)."""
+    return conn.execute(select(DictionaryVersion.version)).scalar() or 0
+
+
+def _build_from_engine() -> _Snapshot:
+    # Exécuté dans le processus de build : moteur synchrone créé à l'import, même DATABASE_URL
+    from ..db.base import engine
+    with engine.connect() as conn:
+        return build_snapshot(conn)
+
+
+class DictionaryIndex:
+    """
+    Index en lecture seule de la table `dictionary`, chargé une fois au démarrage.
+
+    Un tableau trié des graphies de `dictionary_variants` pointe vers un bloc de définitions
+    compacté ; un LRU borné garde les définitions décodées les plus demandées.
+    La sémantique est celle de `lookup_definitions` : pour une graphie, la plus petite
+    priorité (kanji, lecture, puis formes normalisées) l'emporte, puis la plus petite id.
+
+    Chaque reconstruction reçoit un numéro de génération : un snapshot n'est installé que
+    s'il est plus récent que l'index en place, quel que soit l'ordre de fin des builds.
+    """
+
+    def __init__(self, cache_size: int):
+        self._snapshot = None
+        self._cache = LRUCache(cache_size)
+        self._build_lock = threading.Lock()
+        # Un seul build en sous-processus à la fois ; les demandes en attente sont regroupées
+        self._subprocess_lock = asyncio.Lock()
+        self._state_lock = threading.Lock()
+        self._requested = 0
+        self._installed = 0
+        self._watch_task = None
+        self.superseded = 0
+        self.lookups = 0
+        self.not_found = 0
+        self.build_seconds = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def build(self, db: Session):
+        """(Re)construit l'index depuis la base puis remplace l'ancien en une affectation."""
+        with self._build_lock:
+            generation = self._next_generation()
+            start = time.perf_counter()
+            # Requêtes Core sur la connexion de la session : pas d'objets ORM pour ~1 M lignes
+            self._install(build_snapshot(db.connection()), start, generation)
+
+    async def build_in_subprocess(self):
+        """
+        Comme `build`, mais la construction a lieu dans un processus jetable : les ~1 M graphies
+        temporaires ne fragmentent pas le tas du worker (seul le snapshot compacté est reçu,
+        ~35 Mo) et la boucle d'événements garde le GIL pendant ce temps.
+
+        Les builds sont exécutés l'un après l'autre. Une demande dépassée par une plus récente
+        pendant qu'elle attendait son tour est abandonnée : la suivante lira une base au moins
+        aussi à jour.
+        """
+        generation = self._next_generation()
+        async with self._subprocess_lock:
+            if generation != self._requested:
+                with self._state_lock:
+                    self.superseded += 1
+                return
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                snapshot = await asyncio.wrap_future(pool.submit(_build_from_engine))
+            self._install(snapshot, start, generation)
+
+    def _next_generation(self) -> int:
+        with self._state_lock:
+            self._requested += 1
+            return self._requested
+
+    def _install(self, snapshot, start: float, generation: int):
+        with self._state_lock:
+            if generation < self._installed:
+                # Un build lancé après celui-ci a déjà installé un index plus récent
+                self.superseded += 1
+                return
+            self._installed = generation
+            self._snapshot = snapshot
+            self._cache.clear()
+            self.build_seconds = time.perf_counter() - start
+
+    @property
+    def version(self):
+        """Version du dictionnaire de l'index chargé, None s'il n'est pas chargé."""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def watch(self, interval: float):
+        """
+        Surveille la version du dictionnaire en base et reconstruit l'index quand elle change.
+        Un import n'appelle /api/dictionary/reload que sur un seul worker : les autres
+        rechargent ainsi leur index au plus `interval` secondes après.
+        """
+        self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_engine.connect() as conn:
+                    version = await conn.run_sync(read_version)
+                # Index pas encore chargé : le préchauffage s'en charge
+                if self.version is not None and version != self.version:
+                    logging.info("Dictionnaire en version %s (index en version %s) : reconstruction", version, self.version)
+                    await self.build_in_subprocess()
+            except Exception:
+                logging.exception("Échec de la vérification de la version du dictionnaire")
+
+    async def stop_watch(self):
+        if self._watch_task is not None and not self._watch_task.done():
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+        self._watch_task = None
+
+    def invalidate(self):
+        """Oublie l'index : les recherches repassent par SQL jusqu'au prochain `build`."""
+        self._snapshot = None
+        self._cache.clear()
+
+    def _definition(self, snapshot: _Snapshot, pos: int) -> str:
+        # La position est propre à un snapshot : on l'inclut dans la clé du cache
+        key = (id(snapshot), pos)
+        text = self._cache.get(key)
+        if text is None:
+            text = snapshot.definitions[snapshot.offsets[pos]:snapshot.offsets[pos + 1]].decode("utf-8")
+            self._cache.put(key, text)
+        return text
+
+    def has_prefix(self, prefix: str):
+        """Vrai si une graphie commence par `prefix` ; None si l'index n'est pas chargé."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.variants.has_prefix(prefix)
+
+    def lookup_many(self, lemmas):
+        """Retourne {lemme: définitions}, ou None si l'index n'est pas chargé."""
+        found = self.lookup_entries(lemmas)
+        if found is None:
+            return None
+        return {lemma: definitions for lemma, (_, definitions) in found.items()}
+
+    def lookup_entries(self, lemmas):
+        """Retourne {lemme: (id de l'entrée, définitions)}, ou None si l'index n'est pas chargé."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        found = {}
+        for lemma in dict.fromkeys(lemmas):
+            self.lookups += 1
+            # Une seule recherche dichotomique : toutes les graphies sont dans le même tableau
+            pos = snapshot.variants.find(lemma)
+            if pos is None:
+                self.not_found += 1
+                continue
+            found[lemma] = (snapshot.entry_ids[pos], self._definition(snapshot, pos))
+        return found
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "entries": snapshot.entries if snapshot else 0,
+            "variant_keys": len(snapshot.variants) if snapshot else 0,
+            "index_bytes": snapshot.nbytes() if snapshot else 0,
+            "version": snapshot.version if snapshot else None,
+            "build_seconds": round(self.build_seconds, 3),
+            "superseded_builds": self.superseded,
+            "lookups": self.lookups,
+            "not_found": self.not_found,
+            "cache": self._cache.stats(),
+        }
+
+
+dictionary_index = DictionaryIndex(settings.dictionary_cache_size)
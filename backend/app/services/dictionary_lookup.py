@@ -0,0 +1,111 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db.queries import chunks
+from ..models.dictionary import DictionaryEntry, DictionaryVariant
+from .dictionary_index import dictionary_index
+from .kana import is_kana
+
+NO_DEFINITION = "No definition found"
+
+# Catégories Sudachi qui n'ouvrent pas un composé (particules, auxiliaires, ponctuation)
+_NO_COMPOUND_START = {"助詞", "助動詞", "補助記号", "空白"}
+# ... ni ne le ferment : し + た serait lu 下, 所 + で « by the way », 今日 + は « bonjour »
+_NO_COMPOUND_END = {"助詞", "助動詞"}
+
+
+async def lookup_definitions(db: AsyncSession, lemmas) -> dict:
+    """Retourne {lemme: définitions} ; voir `lookup_entries`."""
+    found = await lookup_entries(db, lemmas)
+    return {lemma: definitions for lemma, (_, definitions) in found.items()}
+
+
+async def lookup_entries(db: AsyncSession, lemmas) -> dict:
+    """
+    Résout en une recherche par graphie l'ensemble des lemmes d'une analyse :
+    {lemme: (id de l'entrée, définitions)}.
+
+    Chaque lemme est cherché dans `dictionary_variants` (kanji, lecture, formes normalisées
+    et lecture en katakana) : une graphie exacte du kanji l'emporte, puis celle de la lecture,
+    puis les formes normalisées, et à égalité l'entrée de plus petite id.
+    Les lemmes absents ne figurent pas dans le résultat.
+    L'index en mémoire est utilisé dès qu'il est chargé ; SQL ne sert que de repli.
+    """
+    found = dictionary_index.lookup_entries(lemmas)
+    if found is not None:
+        return found
+
+    entries = {}
+    for chunk in chunks(list(dict.fromkeys(lemmas))):
+        rows = await db.execute(
+            select(DictionaryVariant.variant, DictionaryEntry.id, DictionaryEntry.definitions)
+            .join(DictionaryEntry, DictionaryEntry.id == DictionaryVariant.entry_id)
+            .where(DictionaryVariant.variant.in_(chunk))
+            .order_by(DictionaryVariant.priority, DictionaryEntry.id)
+        )
+        for key, entry_id, text in rows:
+            # Le tri par (priorité, id) garantit que la première ligne vue est celle retenue
+            entries.setdefault(key, (entry_id, text))
+    return entries
+
+
+def _reading_fallback(surface, lemma, part_of_speech) -> bool:
+    """
+    Vrai si un token introuvable sous sa forme du dictionnaire peut être cherché par sa
+    lecture : forme non fléchie écrite en kana (ネコ -> 猫 via la lecture ねこ). Un lemme en
+    kanji ou un nom propre tomberait sur un homophone (今日 -> 京, « capitale impériale »).
+    """
+    return surface == lemma and is_kana(lemma) and part_of_speech[1] != "固有名詞"
+
+
+def _compound_candidates(tokens, max_span):
+    """{(début, fin): graphie} pour les suites de 2 à `max_span` tokens pouvant former une entrée."""
+    candidates = {}
+    for start, (surface, _, _, part_of_speech) in enumerate(tokens):
+        if part_of_speech[0] in _NO_COMPOUND_START:
+            continue
+        prefix = surface
+        for end in range(start + 1, min(len(tokens), start + max_span)):
+            # Élagage par préfixe : inutile d'allonger si aucune graphie ne commence ainsi
+            # (sans index chargé, toutes les suites sont proposées à la requête SQL)
+            if dictionary_index.has_prefix(prefix) is False:
+                break
+            # Le dernier token est pris sous sa forme du dictionnaire : 取り + 扱っ -> 取り扱う
+            if tokens[end][3][0] not in _NO_COMPOUND_END:
+                candidates[(start, end + 1)] = prefix + tokens[end][1]
+            prefix += tokens[end][0]
+    return candidates
+
+
+async def match_tokens(db: AsyncSession, tokens, max_span: int):
+    """
+    Regroupe les tokens Sudachi en mots du dictionnaire : [(début, fin, graphie, id de l'entrée, définitions)].
+
+    Le plus long composé de tokens adjacents présent dans le dictionnaire l'emporte
+    (前向き + 推論 -> 前向き推論) ; sinon le token est cherché par sa forme du dictionnaire,
+    puis, s'il n'est pas fléchi et écrit en kana, par sa lecture. Id et définitions valent None si rien n'est trouvé.
+    Toutes les graphies candidates sont résolues en un seul appel à `lookup_entries`.
+    """
+    candidates = _compound_candidates(tokens, max_span) if max_span > 1 else {}
+    keys = [lemma for _, lemma, _, _ in tokens]
+    keys += [reading for surface, lemma, reading, pos in tokens if _reading_fallback(surface, lemma, pos)]
+    keys += candidates.values()
+    entries = await lookup_entries(db, keys)
+
+    words, start = [], 0
+    while start < len(tokens):
+        for end in range(min(len(tokens), start + max_span), start + 1, -1):
+            key = candidates.get((start, end))
+            if key in entries:
+                words.append((start, end, key, *entries[key]))
+                start = end
+                break
+        else:
+            surface, lemma, reading, part_of_speech = tokens[start]
+            entry = entries.get(lemma)
+            # Forme du dictionnaire absente (graphie rare côté Sudachi) : la lecture katakana
+            # retrouve l'entrée via sa variante
+            if entry is None and _reading_fallback(surface, lemma, part_of_speech):
+                entry = entries.get(reading)
+            words.append((start, start + 1, lemma, *(entry or (None, None))))
+            start += 1
+    return words
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, update, delete, func, case, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..core.metrics import metrics
+from ..db.base import AsyncSessionLocal, IS_SQLITE
+from ..db.queries import chunks, owner_filter
+from ..models.card import UserCard
+from ..models.dictionary import DictionaryEntry
+from ..models.document import Document, Lemma, DocumentToken
+from .dictionary_lookup import match_tokens, NO_DEFINITION
+from .known_words import known_words
+from .sentences import sentence_around
+from .tokenization import tokenize_text_async
+
+# Tokens non stockés : la ponctuation et les blancs se retrouvent entre les offsets des mots
+_NOT_WORDS = {"補助記号", "空白"}
+
+# Statuts d'un document dont l'analyse n'a pas abouti (tâche perdue si le serveur s'arrête)
+UNFINISHED = ("pending", "processing")
+
+# Analyses relancées au démarrage : asyncio ne garde qu'une référence faible aux tâches
+_resumed = set()
+
+
+def token_offsets(text: str, tokens):
+    """(début, fin) de chaque token dans le texte ; les surfaces Sudachi se suivent dans l'ordre."""
+    offsets, position = [], 0
+    for surface, _, _, _ in tokens:
+        start = text.find(surface, position)
+        if start < 0:
+            # Surface normalisée par Sudachi (rare) : on avance sans la retrouver
+            start = position
+        offsets.append((start, start + len(surface)))
+        position = start + len(surface)
+    return offsets
+
+
+async def _lemma_ids(db: AsyncSession, lemmas) -> dict:
+    """Retourne {lemme: id}, en créant les lemmes absents (sans conflit entre deux analyses)."""
+    if IS_SQLITE:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    unique = list(dict.fromkeys(lemmas))
+    ids = {}
+    for chunk in chunks(unique):
+        await db.execute(
+            dialect_insert(Lemma).on_conflict_do_nothing(index_elements=["text"]),
+            [{"text": lemma} for lemma in chunk],
+        )
+        rows = await db.execute(select(Lemma.text, Lemma.id).where(Lemma.text.in_(chunk)))
+        ids.update(rows.all())
+    return ids
+
+
+async def analyze_document(document_id: int):
+    """
+    Tâche de fond : tokenise et résout le document une fois pour toutes, puis stocke
+    un mot par ligne de `document_tokens` (offsets, lemme, entrée du dictionnaire).
+    Relancée sur un document déjà analysé, elle remplace ses tokens.
+    """
+    async with AsyncSessionLocal() as db:
+        document = await db.get(Document, document_id)
+        if document is None:
+            return
+        document.status = "processing"
+        document.error = None
+        await db.commit()
+        try:
+            with metrics.timer("document_analysis"):
+                tokens = await tokenize_text_async(document.text, cache=False)
+                offsets = token_offsets(document.text, tokens)
+                words = [
+                    word for word in await match_tokens(db, tokens, settings.dictionary_compound_span)
+                    if tokens[word[0]][3][0] not in _NOT_WORDS
+                ]
+                lemma_ids = await _lemma_ids(db, [lemma for _, _, lemma, _, _ in words])
+                rows = [
+                    {
+                        "document_id": document_id,
+                        "start_offset": offsets[start][0],
+                        "end_offset": offsets[end - 1][1],
+                        "lemma_id": lemma_ids[lemma],
+                        "entry_id": entry_id,
+                        "reading": "".join(reading for _, _, reading, _ in tokens[start:end]),
+                        "part_of_speech": ",".join(tokens[end - 1][3]),
+                    }
+                    for start, end, lemma, entry_id, _ in words
+                ]
+                # Même transaction que l'insertion : une analyse interrompue ne laisse rien
+                await db.execute(delete(DocumentToken).where(DocumentToken.document_id == document_id))
+                for chunk in chunks(rows):
+                    await db.execute(insert(DocumentToken), chunk)
+            document.status = "ready"
+            document.token_count = len(rows)
+            document.analyzed_at = datetime.now()
+            await db.commit()
+        except Exception as e:
+            logging.exception("Échec de l'analyse du document %s", document_id)
+            await db.rollback()
+            await db.execute(update(Document).where(Document.id == document_id).values(status="failed", error=str(e)))
+            await db.commit()
+
+
+async def resume_documents():
+    """
+    Étape de préchauffage : relance, en tâche de fond et l'un après l'autre, l'analyse des
+    documents restés "pending" ou "processing" lors de l'arrêt précédent du serveur.
+    Avec plusieurs workers, chacun les relance : l'analyse remplaçant les tokens du
+    document, une analyse en double ne coûte que du temps.
+    """
+    async with AsyncSessionLocal() as db:
+        ids = (await db.execute(
+            select(Document.id).where(Document.status.in_(UNFINISHED)).order_by(Document.id)
+        )).scalars().all()
+    if ids:
+        logging.info("Analyse relancée pour %s document(s) interrompu(s)", len(ids))
+        task = asyncio.create_task(_analyze_all(ids))
+        _resumed.add(task)
+        task.add_done_callback(_resumed.discard)
+
+
+async def _analyze_all(document_ids):
+    for document_id in document_ids:
+        await analyze_document(document_id)
+
+
+async def stop_resumed():
+    """Annule les analyses relancées encore en cours : elles le seront au prochain démarrage."""
+    for task in list(_resumed):
+        task.cancel()
+    await asyncio.gather(*_resumed, return_exceptions=True)
+
+
+async def document_tokens(db: AsyncSession, document: Document, user_id=None):
+    """
+    Tokens d'un document analysé, au format de /api/test-nlp, avec le statut actuel de
+    l'utilisateur. Rien n'est re-tokenisé : une requête pour les mots, une pour les statuts.
+    Le texte entre deux mots (ponctuation, blancs) est rendu comme un token sans définition.
+    """
+    rows = (await db.execute(
+        select(
+            DocumentToken.start_offset, DocumentToken.end_offset, Lemma.text,
+            DocumentToken.reading, DocumentToken.part_of_speech, DictionaryEntry.definitions,
+        )
+        .join(Lemma, Lemma.id == DocumentToken.lemma_id)
+        .outerjoin(DictionaryEntry, DictionaryEntry.id == DocumentToken.entry_id)
+        .where(DocumentToken.document_id == document.id)
+        .order_by(DocumentToken.start_offset)
+    )).all()
+    statuses = await known_words.statuses(db, [row.text for row in rows], user_id)
+
+    text, results, position = document.text, [], 0
+
+    def gap(start, end):
+        surface = text[start:end]
+        if surface:
+            results.append({
+                "surface": surface, "dictionary_form": surface, "reading": surface,
+                "part_of_speech": ["補助記号"], "definition": NO_DEFINITION, "status": "new",
+                "start": start, "end": end,
+            })
+
+    for start, end, lemma, reading, part_of_speech, definitions in rows:
+        gap(position, start)
+        results.append({
+            "surface": text[start:end],
+            "dictionary_form": lemma,
+            "reading": reading,
+            "part_of_speech": part_of_speech.split(","),
+            "definition": definitions if definitions is not None else NO_DEFINITION,
+            "status": statuses.get(lemma, "new"),
+            "start": start,
+            "end": end,
+        })
+        position = end
+    gap(position, len(text))
+    return results
+
+
+async def list_documents(db: AsyncSession, user_id=None):
+    """
+    Documents de l'utilisateur avec leur densité de mots inconnus (sans carte), calculée
+    en une requête groupée sur `document_tokens` : aucun texte n'est relu ni re-tokenisé.
+    """
+    known = select(UserCard.lemma).where(owner_filter(UserCard.user_id, user_id))
+    unknown = case((Lemma.text.in_(known), 0), else_=1)
+    densities = (
+        select(
+            DocumentToken.document_id,
+            func.sum(unknown).label("unknown_tokens"),
+            func.count(func.distinct(case((Lemma.text.in_(known), None), else_=Lemma.id))).label("unknown_lemmas"),
+        )
+        .join(Lemma, Lemma.id == DocumentToken.lemma_id)
+        .group_by(DocumentToken.document_id)
+        .subquery()
+    )
+    rows = await db.execute(
+        select(
+            Document.id, Document.title, Document.status, Document.token_count, Document.created_at,
+            densities.c.unknown_tokens, densities.c.unknown_lemmas,
+        )
+        .outerjoin(densities, densities.c.document_id == Document.id)
+        .where(owner_filter(Document.user_id, user_id))
+        .order_by(Document.id.desc())
+    )
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "status": row.status,
+            "token_count": row.token_count,
+            "created_at": row.created_at,
+            "unknown_tokens": row.unknown_tokens or 0,
+            "unknown_lemmas": row.unknown_lemmas or 0,
+            "unknown_density": (row.unknown_tokens or 0) / row.token_count if row.token_count else 0.0,
+        }
+        for row in rows
+    ]
+
+
+async def lemma_contexts(db: AsyncSession, lemma: str, limit: int, user_id=None):
+    """Toutes les phrases des documents où apparaît le lemme, via l'index (lemma_id, document_id)."""
+    rows = (await db.execute(
+        select(DocumentToken.document_id, Document.title, DocumentToken.start_offset, DocumentToken.end_offset)
+        .join(Lemma, Lemma.id == DocumentToken.lemma_id)
+        .join(Document, Document.id == DocumentToken.document_id)
+        .where(Lemma.text == lemma, owner_filter(Document.user_id, user_id))
+        .order_by(DocumentToken.document_id, DocumentToken.start_offset)
+        .limit(limit)
+    )).all()
+    if not rows:
+        return []
+    # Chaque texte n'est lu qu'une fois, quel que soit le nombre d'occurrences
+    texts = dict((await db.execute(
+        select(Document.id, Document.text).where(Document.id.in_({row.document_id for row in rows}))
+    )).all())
+    return [
+        {
+            "document_id": row.document_id,
+            "title": row.title,
+            "start": row.start_offset,
+            "end": row.end_offset,
+            "sentence": sentence_around(texts[row.document_id], row.start_offset, row.end_offset),
+        }
+        for row in rows
+    ]
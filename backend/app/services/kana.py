@@ -0,0 +1,51 @@
+import unicodedata
+
+# Décalage entre les blocs hiragana (ぁ-ゖ) et katakana (ァ-ヶ)
+_KANA_OFFSET = ord("ァ") - ord("ぁ")
+_TO_HIRAGANA = {code: code - _KANA_OFFSET for code in range(ord("ァ"), ord("ヶ") + 1)}
+_TO_KATAKANA = {code: code + _KANA_OFFSET for code in range(ord("ぁ"), ord("ゖ") + 1)}
+
+# Priorité d'une graphie : à égalité de clé, la plus petite l'emporte, puis la plus petite id
+KANJI, READING, KANJI_VARIANT, READING_VARIANT = range(4)
+
+
+def to_hiragana(text: str) -> str:
+    return text.translate(_TO_HIRAGANA)
+
+
+def to_katakana(text: str) -> str:
+    return text.translate(_TO_KATAKANA)
+
+
+def is_kana(text: str) -> bool:
+    """Vrai si le texte n'est écrit qu'en kana (blocs hiragana et katakana, ー compris)."""
+    return bool(text) and all("\u3040" <= char <= "\u30ff" for char in text)
+
+
+def entry_variants(kanji, reading):
+    """
+    Graphies d'une entrée du dictionnaire avec leur priorité : {graphie: priorité}.
+
+    Le kanji et la lecture tels quels gardent la sémantique de l'ancienne recherche
+    (kanji d'abord, puis lecture). S'y ajoutent les formes NFKC (pleine chasse -> ASCII),
+    leur transcription en hiragana, et la lecture en katakana telle que la renvoie
+    `reading_form()` de Sudachi.
+    """
+    variants = {}
+
+    def add(text, priority):
+        if text and text not in variants:
+            variants[text] = priority
+
+    add(kanji, KANJI)
+    add(reading, READING)
+    if kanji:
+        normalized = unicodedata.normalize("NFKC", kanji)
+        add(normalized, KANJI_VARIANT)
+        add(to_hiragana(normalized), KANJI_VARIANT)
+    if reading:
+        normalized = unicodedata.normalize("NFKC", reading)
+        add(normalized, READING_VARIANT)
+        add(to_hiragana(normalized), READING_VARIANT)
+        add(to_katakana(normalized), READING_VARIANT)
+    return variants
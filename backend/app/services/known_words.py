@@ -0,0 +1,111 @@
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..db.queries import chunks, owner_filter
+from ..models.card import UserCard
+
+
+class KnownWords:
+    """
+    Statut (learning, mastered...) des lemmes de l'utilisateur, limité aux lemmes demandés.
+
+    Ne lit que (lemma, status) via l'index (user_id, lemma) au lieu d'hydrater toutes les cartes.
+    Les résultats, absences comprises, sont gardés par utilisateur ; les routes qui modifient
+    un statut appellent `invalidate` pour le lemme concerné. Cette invalidation ne touche que
+    le processus courant : le cache d'un utilisateur est vidé après `ttl` secondes pour que
+    les autres workers voient aussi les écritures.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: float = 0):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._maps = {}
+        # Date (time.monotonic) de création du cache de chaque utilisateur
+        self._loaded = {}
+        # Incrémentée à chaque invalidation : un résultat lu avant n'est pas mis en cache
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _user_map(self, user_id) -> dict:
+        now = time.monotonic()
+        if self.ttl and user_id in self._maps and now - self._loaded[user_id] > self.ttl:
+            del self._maps[user_id]
+            # Une lecture commencée avant l'expiration ne doit pas remplir le nouveau cache
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.expired += 1
+        if user_id not in self._maps:
+            self._maps[user_id] = {}
+            self._loaded[user_id] = now
+        return self._maps[user_id]
+
+    async def _query(self, db: AsyncSession, lemmas, user_id):
+        found, latest = {}, {}
+        for chunk in chunks(lemmas):
+            # Pas d'ORDER BY : il ferait préférer à SQLite l'index sur user_id seul
+            rows = await db.execute(
+                select(UserCard.id, UserCard.lemma, UserCard.status)
+                .where(owner_filter(UserCard.user_id, user_id), UserCard.lemma.in_(chunk))
+            )
+            for card_id, lemma, status in rows:
+                # Comme l'ancien dictionnaire {card.lemma: card.status}, la dernière carte l'emporte
+                if card_id > latest.get(lemma, -1):
+                    latest[lemma] = card_id
+                    found[lemma] = status
+        return found
+
+    async def statuses(self, db: AsyncSession, lemmas, user_id=None) -> dict:
+        """Retourne {lemme: statut} pour les lemmes ayant une carte ; les autres sont absents."""
+        unique = list(dict.fromkeys(lemmas))
+        if not self.enabled:
+            return await self._query(db, unique, user_id)
+
+        with self._lock:
+            cached = self._user_map(user_id)
+            generation = self._generations.get(user_id, 0)
+            missing = [lemma for lemma in unique if lemma not in cached]
+            self.hits += len(unique) - len(missing)
+            self.misses += len(missing)
+            result = {lemma: cached[lemma] for lemma in unique if lemma in cached}
+
+        if missing:
+            found = await self._query(db, missing, user_id)
+            with self._lock:
+                if self._generations.get(user_id, 0) == generation:
+                    for lemma in missing:
+                        cached[lemma] = found.get(lemma)
+            result.update(found)
+
+        return {lemma: status for lemma, status in result.items() if status is not None}
+
+    def invalidate(self, lemma: str, user_id=None):
+        with self._lock:
+            self._maps.get(user_id, {}).pop(lemma, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._maps.clear()
+            self._loaded.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "users": len(self._maps),
+            "cached_lemmas": sum(len(m) for m in self._maps.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+known_words = KnownWords(settings.known_words_cache, settings.known_words_cache_ttl)
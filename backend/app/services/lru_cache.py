@@ -0,0 +1,102 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def deep_sizeof(obj) -> int:
+    """
+    Taille mémoire d'une valeur et de tout ce qu'elle contient (tuples, listes, dicts, chaînes).
+
+    Un objet partagé (tuple POS de Sudachi, chaîne internée) n'est compté qu'une fois par valeur ;
+    d'une entrée à l'autre il l'est à nouveau : le total est un majorant.
+    """
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, (tuple, list, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+    return size
+
+
+class LRUCache:
+    """
+    Cache LRU borné et thread-safe, avec compteurs de hits/misses.
+
+    Deux bornes : le nombre d'entrées (`maxsize`, 0 désactive le cache) et, si `max_bytes` est
+    positif, la taille mémoire totale des valeurs mesurée par `deep_sizeof` à l'insertion.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int = 0):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        # Mesuré hors du verrou : le parcours d'une longue liste de tokens n'est pas gratuit
+        size = deep_sizeof(value)
+        # Une valeur plus grosse que tout le cache en chasserait toutes les autres sans y tenir
+        if 0 < self.max_bytes < size:
+            return
+        with self._lock:
+            self._bytes += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize or (0 < self.max_bytes < self._bytes):
+                old_key, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def items(self):
+        """Copie des entrées, de la moins à la plus récemment utilisée."""
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
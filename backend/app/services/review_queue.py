@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db.queries import owner_filter
+from ..models.card import UserCard, CardContext
+
+
+def encode_cursor(due: datetime, card_id: int) -> str:
+    raw = json.dumps([due.isoformat(), card_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """Retourne (date d'échéance, id) ; lève ValueError si le curseur est invalide."""
+    try:
+        due, card_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(due), int(card_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Curseur de pagination invalide") from e
+
+
+async def fetch_review_page(db: AsyncSession, now: datetime, limit: int, cursor: str | None = None, user_id=None):
+    """
+    Une page de cartes à réviser, triées par (échéance, id), avec leur première phrase de contexte.
+
+    Une seule requête : le contexte vient d'une sous-requête corrélée (index sur card_id)
+    et la pagination se fait par curseur sur l'index (user_id, next_review_date).
+    Retourne (cartes, curseur de la page suivante ou None).
+    """
+    first_context = (
+        select(CardContext.sentence_text)
+        .where(CardContext.card_id == UserCard.id)
+        .order_by(CardContext.id)
+        .limit(1)
+        .correlate(UserCard)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            UserCard.id, UserCard.word_text, UserCard.reading, UserCard.definition,
+            UserCard.next_review_date, first_context.label("context_sentence"),
+        )
+        .where(owner_filter(UserCard.user_id, user_id), UserCard.next_review_date <= now)
+    )
+    if cursor:
+        due, card_id = decode_cursor(cursor)
+        query = query.where(or_(
+            UserCard.next_review_date > due,
+            and_(UserCard.next_review_date == due, UserCard.id > card_id),
+        ))
+    result = await db.execute(query.order_by(UserCard.next_review_date, UserCard.id).limit(limit + 1))
+    rows = result.all()
+
+    # La ligne en trop indique seulement qu'une page suivante existe
+    next_cursor = encode_cursor(rows[limit - 1].next_review_date, rows[limit - 1].id) if len(rows) > limit else None
+    items = [
+        {
+            "id": row.id,
+            "word_text": row.word_text,
+            "reading": row.reading,
+            "definition": row.definition,
+            "context_sentence": row.context_sentence or "",
+        }
+        for row in rows[:limit]
+    ]
+    return items, next_cursor
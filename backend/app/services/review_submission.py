@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import cast, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..db.base import IS_SQLITE
+from ..db.queries import chunks, owner_filter
+from ..models.card import UserCard
+from .scheduler import CardStates, Scheduler
+from .srs_algorithm import to_local_naive
+
+STATE_COLUMNS = (
+    UserCard.id, UserCard.interval, UserCard.ease_factor, UserCard.stability,
+    UserCard.difficulty, UserCard.last_review_date, UserCard.next_review_date,
+)
+UPDATED_COLUMNS = ("id", "interval", "ease_factor", "stability", "difficulty", "next_review_date", "last_review_date")
+
+
+async def load_card_states(db: AsyncSession, now: datetime, card_ids=None, user_id=None, for_update=False):
+    """
+    Retourne (ids, CardStates) pour les cartes demandées, ou tout le deck si `card_ids` est None.
+    Avec `for_update`, les lignes restent verrouillées jusqu'à la fin de la transaction
+    (SELECT ... FOR UPDATE, par ordre d'id pour que deux lots ne s'attendent pas mutuellement).
+    """
+    query = select(*STATE_COLUMNS).where(owner_filter(UserCard.user_id, user_id))
+    if for_update:
+        query = query.order_by(UserCard.id).with_for_update()
+    if card_ids is None:
+        rows = (await db.execute(query)).all()
+    else:
+        rows = []
+        for chunk in chunks(sorted(card_ids)):
+            result = await db.execute(query.where(UserCard.id.in_(chunk)))
+            rows.extend(result.all())
+    return np.array([r.id for r in rows], dtype=np.int64), CardStates.from_rows(rows, now)
+
+
+def update_from_values(params):
+    """UPDATE ... FROM (VALUES ...) : toutes les cartes du lot en une seule instruction."""
+    table = UserCard.__table__
+    rows = values(*(column(name, table.c[name].type) for name in UPDATED_COLUMNS), name="reviewed").data(
+        [tuple(p[name] for name in UPDATED_COLUMNS) for p in params]
+    )
+    return (
+        update(UserCard)
+        .where(UserCard.id == rows.c.id)
+        # Une colonne de VALUES entièrement NULL (stabilité sous SM-2) serait typée text
+        .values({name: cast(rows.c[name], table.c[name].type) for name in UPDATED_COLUMNS if name != "id"})
+    )
+
+
+async def lock_for_update(db: AsyncSession):
+    """
+    SQLite ignore FOR UPDATE : la transaction commence par BEGIN IMMEDIATE, qui prend le
+    verrou d'écriture avant la lecture des états. Sans lui, un lot concurrent pourrait
+    écrire entre notre lecture et notre UPDATE, et l'une des deux révisions serait perdue.
+    """
+    if not IS_SQLITE:
+        return
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    # pysqlite n'ouvre la transaction qu'au premier INSERT/UPDATE : les SELECT précédents n'en ont pas
+    if not raw.driver_connection.in_transaction:
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+async def apply_review_batch(db: AsyncSession, reviews, scheduler: Scheduler, user_id=None) -> dict:
+    """
+    Applique un lot de résultats (card_id, quality, reviewed_at) en une transaction.
+
+    Idempotent : un résultat dont `reviewed_at` n'est pas postérieur à la dernière révision
+    enregistrée de la carte est ignoré, ce qui permet de rejouer une file hors ligne.
+    Les résultats sont appliqués par ordre chronologique ; chaque passe vectorisée traite
+    au plus un résultat par carte.
+
+    Les cartes du lot sont verrouillées de leur lecture au commit : deux lots concurrents
+    sur une même carte s'appliquent l'un après l'autre.
+
+    Un `reviewed_at` postérieur à maintenant (au-delà de `review_clock_skew_seconds`) est
+    rejeté et listé dans "future" : accepté, il rendrait la carte insensible à toute
+    révision réelle jusqu'à cette date.
+    """
+    now = datetime.now()
+    horizon = now + timedelta(seconds=settings.review_clock_skew_seconds)
+    pending, future = [], set()
+    for r in reviews:
+        moment = to_local_naive(r.reviewed_at)
+        if moment > horizon:
+            future.add(r.card_id)
+        else:
+            pending.append((r.card_id, r.quality, moment))
+    pending.sort(key=lambda r: r[2])
+    await lock_for_update(db)
+    ids, states = await load_card_states(
+        db, now, list({card_id for card_id, _, _ in pending}), user_id, for_update=True,
+    )
+    position = {card_id: i for i, card_id in enumerate(ids.tolist())}
+    missing = sorted({card_id for card_id, _, _ in pending if card_id not in position})
+
+    applied, skipped, updated = 0, 0, set()
+    pending = [r for r in pending if r[0] in position]
+    while pending:
+        batch, later, seen = [], [], set()
+        for review in pending:
+            (later if review[0] in seen else batch).append(review)
+            seen.add(review[0])
+        pending = later
+
+        idx = np.array([position[card_id] for card_id, _, _ in batch], dtype=np.int64)
+        reviewed_at = np.array([moment for _, _, moment in batch], dtype="datetime64[us]")
+        last_review = states.last_review[idx]
+        fresh = np.isnat(last_review) | (reviewed_at > last_review)
+        skipped += int((~fresh).sum())
+        if not fresh.any():
+            continue
+
+        idx = idx[fresh]
+        qualities = np.array([quality for _, quality, _ in batch])[fresh]
+        states.put(idx, scheduler.review(states.take(idx), qualities, reviewed_at[fresh]))
+        updated.update(idx.tolist())
+        applied += len(idx)
+
+    if updated:
+        params = [
+            {
+                "id": int(ids[i]),
+                "interval": int(states.interval[i]),
+                "ease_factor": float(states.ease[i]),
+                "stability": None if np.isnan(states.stability[i]) else float(states.stability[i]),
+                "difficulty": None if np.isnan(states.difficulty[i]) else float(states.difficulty[i]),
+                "next_review_date": states.due[i].item(),
+                "last_review_date": states.last_review[i].item(),
+            }
+            for i in sorted(updated)
+        ]
+        if IS_SQLITE:
+            # UPDATE groupé par clé primaire (executemany), exécuté d'un bloc dans le thread d'aiosqlite
+            await db.execute(update(UserCard), params)
+        else:
+            # Avec psycopg asynchrone, executemany rend la main à la boucle d'événements entre
+            # deux lignes : sous charge, la transaction restait ouverte un tour de boucle par carte
+            for chunk in chunks(params):
+                await db.execute(update_from_values(chunk))
+    await db.commit()
+    return {"applied": applied, "skipped": skipped, "missing": missing, "future": sorted(future)}
@@ -0,0 +1,216 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+import numpy as np
+
+from .srs_algorithm import MAX_INTERVAL, calculate_next_reviews, to_local_naive
+
+DAY = np.timedelta64(1, "D")
+
+
+@dataclass
+class CardStates:
+    """État SRS d'un ensemble de cartes : un tableau NumPy par colonne de `user_cards`."""
+
+    interval: np.ndarray     # jours (int64)
+    ease: np.ndarray         # facteur SM-2
+    stability: np.ndarray    # jours (FSRS), NaN tant que la carte n'a pas d'état FSRS
+    difficulty: np.ndarray   # 1 à 10 (FSRS), NaN tant que la carte n'a pas d'état FSRS
+    last_review: np.ndarray  # datetime64[us], NaT si jamais révisée
+    due: np.ndarray          # datetime64[us]
+
+    @classmethod
+    def from_rows(cls, rows, now: datetime):
+        """Construit l'état depuis des lignes (interval, ease_factor, stability, difficulty, last_review_date, next_review_date)."""
+        def dates(values):
+            return np.array([to_local_naive(v) if v is not None else None for v in values], dtype="datetime64[us]")
+
+        def floats(values):
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+        return cls(
+            interval=np.array([r.interval or 1 for r in rows], dtype=np.int64),
+            ease=np.array([r.ease_factor or 2.5 for r in rows], dtype=np.float64),
+            stability=floats([r.stability for r in rows]),
+            difficulty=floats([r.difficulty for r in rows]),
+            last_review=dates([r.last_review_date for r in rows]),
+            due=dates([r.next_review_date or now for r in rows]),
+        )
+
+    def __len__(self):
+        return len(self.interval)
+
+    def take(self, idx):
+        return CardStates(*(getattr(self, f)[idx] for f in self.__dataclass_fields__))
+
+    def put(self, idx, other: "CardStates"):
+        for field in self.__dataclass_fields__:
+            getattr(self, field)[idx] = getattr(other, field)
+
+
+class Scheduler(ABC):
+    """Moteur de planification : opère sur des tableaux d'états plutôt que carte par carte."""
+
+    name = ""
+
+    @abstractmethod
+    def review(self, states: CardStates, qualities, reviewed_at) -> CardStates:
+        """Nouvel état après les notes `qualities` ('forgot', 'hard', 'easy') données à `reviewed_at`."""
+
+    @abstractmethod
+    def recall_probability(self, states: CardStates, at) -> np.ndarray:
+        """Probabilité de se souvenir de chaque carte à la date `at` (utilisée par la simulation)."""
+
+    def simulate(self, states: CardStates, days: int, now: datetime, seed: int = 0, hard_ratio: float = 0.15):
+        """
+        Projette le nombre de révisions par jour sur `days` jours pour tout le deck.
+
+        Chaque jour, les cartes dues sont révisées d'un bloc : l'oubli est tiré selon
+        `recall_probability`, et une réussite sur `hard_ratio` est notée 'hard'.
+        Les cartes en retard sont comptées le premier jour.
+        """
+        rng = np.random.default_rng(seed)
+        states = states.take(np.arange(len(states)))  # copie : l'état du deck n'est pas modifié
+        today = np.datetime64(now.date(), "us")
+        due_day = np.maximum(np.floor((states.due - today) / DAY), 0).astype(np.int64)
+        load = np.zeros(days, dtype=np.int64)
+
+        for day in range(days):
+            idx = np.flatnonzero(due_day == day)
+            load[day] = len(idx)
+            if not len(idx):
+                continue
+            at = today + day * DAY
+            cards = states.take(idx)
+            recalled = rng.random(len(idx)) < self.recall_probability(cards, at)
+            hard = rng.random(len(idx)) < hard_ratio
+            qualities = np.where(recalled, np.where(hard, "hard", "easy"), "forgot")
+            reviewed = self.review(cards, qualities, np.full(len(idx), at))
+            states.put(idx, reviewed)
+            due_day[idx] = day + reviewed.interval
+        return load
+
+
+class SM2Scheduler(Scheduler):
+    """SM-2 simplifié historique de l'application (calculate_next_review), sans modèle de mémoire."""
+
+    name = "sm2"
+
+    def __init__(self, retention: float = 0.9):
+        # SM-2 ne modélise pas l'oubli : la simulation suppose un taux de réussite constant
+        self.retention = retention
+
+    def review(self, states, qualities, reviewed_at):
+        intervals, eases, due = calculate_next_reviews(states.interval, states.ease, qualities, reviewed_at)
+        return replace(
+            states, interval=intervals, ease=eases,
+            last_review=np.asarray(reviewed_at, dtype="datetime64[us]"), due=due,
+        )
+
+    def recall_probability(self, states, at):
+        return np.full(len(states), self.retention)
+
+
+class FSRSScheduler(Scheduler):
+    """
+    FSRS v4.5 (Free Spaced Repetition Scheduler), poids par défaut publiés.
+
+    Les notes de l'application sont converties en notes FSRS : 'forgot' -> Again (1),
+    'hard' -> Hard (2), 'easy' -> Good (3), le bouton « Facile » étant la réussite normale.
+    Une carte issue de SM-2 sans état FSRS part d'une stabilité égale à son intervalle.
+    L'ancienne version n'enregistrait pas last_review_date : une telle carte n'est nouvelle
+    que si elle n'a pas non plus d'historique SM-2 (intervalle 1 et facilité 2.5), et sa
+    dernière révision est alors estimée à échéance - intervalle.
+    """
+
+    name = "fsrs"
+    DECAY = -0.5
+    FACTOR = 19 / 81
+    DEFAULT_WEIGHTS = (
+        0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+        0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+    )
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, desired_retention: float = 0.9, maximum_interval: int = MAX_INTERVAL):
+        self.w = np.asarray(weights, dtype=np.float64)
+        self.desired_retention = desired_retention
+        self.maximum_interval = maximum_interval
+
+    def _retrievability(self, elapsed_days, stability):
+        return np.power(1 + self.FACTOR * elapsed_days / stability, self.DECAY)
+
+    def _initial_difficulty(self, grades):
+        return np.clip(self.w[4] - (grades - 3) * self.w[5], 1, 10)
+
+    def _is_new(self, states):
+        """Cartes jamais révisées : ni état FSRS, ni date de révision, ni historique SM-2."""
+        sm2_history = (states.interval > 1) | (states.ease != 2.5)
+        return np.isnan(states.stability) & np.isnat(states.last_review) & ~sm2_history
+
+    def _last_review(self, states):
+        # Révision SM-2 sans date enregistrée : l'échéance a été fixée à révision + intervalle
+        estimated = states.due - states.interval.astype("timedelta64[D]")
+        return np.where(np.isnat(states.last_review), estimated, states.last_review)
+
+    def _elapsed_days(self, states, at):
+        elapsed = (np.asarray(at, dtype="datetime64[us]") - self._last_review(states)) / DAY
+        return np.maximum(np.nan_to_num(elapsed, nan=0.0), 0.0)
+
+    def _current_memory(self, states):
+        """Stabilité et difficulté, reconstituées depuis SM-2 quand la carte n'a pas d'état FSRS."""
+        stability = np.where(np.isnan(states.stability), states.interval.astype(np.float64), states.stability)
+        # Facilité SM-2 de 1.3 (difficile) à 2.5+ (facile) ramenée sur l'échelle 10 -> 1
+        legacy_difficulty = np.clip(10 - (states.ease - 1.3) * 5, 1, 10)
+        difficulty = np.where(np.isnan(states.difficulty), legacy_difficulty, states.difficulty)
+        return np.maximum(stability, 0.1), difficulty
+
+    def review(self, states, qualities, reviewed_at):
+        w = self.w
+        qualities = np.asarray(qualities)
+        grades = np.select([qualities == "forgot", qualities == "hard"], [1, 2], default=3).astype(np.float64)
+        first = self._is_new(states)
+
+        stability, difficulty = self._current_memory(states)
+        r = self._retrievability(self._elapsed_days(states, reviewed_at), stability)
+
+        next_difficulty = difficulty - w[6] * (grades - 3)
+        next_difficulty = np.clip(w[7] * self._initial_difficulty(3) + (1 - w[7]) * next_difficulty, 1, 10)
+
+        recall_stability = stability * (
+            1 + np.exp(w[8]) * (11 - difficulty) * np.power(stability, -w[9])
+            * (np.exp(w[10] * (1 - r)) - 1)
+            * np.where(grades == 2, w[15], 1.0)
+        )
+        forget_stability = (
+            w[11] * np.power(difficulty, -w[12]) * (np.power(stability + 1, w[13]) - 1) * np.exp(w[14] * (1 - r))
+        )
+        next_stability = np.where(grades == 1, forget_stability, recall_stability)
+
+        # Première révision : état initial selon la note
+        next_stability = np.where(first, w[grades.astype(np.int64) - 1], next_stability)
+        next_difficulty = np.where(first, self._initial_difficulty(grades), next_difficulty)
+
+        intervals = next_stability / self.FACTOR * (np.power(self.desired_retention, 1 / self.DECAY) - 1)
+        intervals = np.clip(np.round(intervals), 1, self.maximum_interval).astype(np.int64)
+        reviewed_at = np.asarray(reviewed_at, dtype="datetime64[us]")
+        return replace(
+            states, interval=intervals, stability=next_stability, difficulty=next_difficulty,
+            last_review=reviewed_at, due=reviewed_at + intervals.astype("timedelta64[D]"),
+        )
+
+    def recall_probability(self, states, at):
+        stability, _ = self._current_memory(states)
+        r = self._retrievability(self._elapsed_days(states, at), stability)
+        # Carte jamais révisée : pas de mémoire à modéliser, on suppose la rétention visée
+        return np.where(self._is_new(states), self.desired_retention, r)
+
+
+SCHEDULERS = {scheduler.name: scheduler for scheduler in (SM2Scheduler, FSRSScheduler)}
+
+
+def get_scheduler(name: str) -> Scheduler:
+    try:
+        return SCHEDULERS[name]()
+    except KeyError:
+        raise ValueError(f"Planificateur inconnu : {name}") from None
@@ -0,0 +1,22 @@
+import re
+
+# Fins de phrase : mêmes délimiteurs que le Reader côté frontend
+SENTENCE_END = re.compile(r"[。！？\n]")
+
+
+def split_sentences(text: str):
+    """Découpe le texte après chaque fin de phrase ; la concaténation redonne le texte d'origine."""
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def sentence_around(text: str, start: int, end: int) -> str:
+    """Phrase contenant text[start:end], délimitée comme dans le Reader."""
+    before = max((m.end() for m in SENTENCE_END.finditer(text, 0, start)), default=0)
+    after = SENTENCE_END.search(text, end)
+    return text[before:after.end() if after else len(text)].strip()
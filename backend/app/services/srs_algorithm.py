@@ -1,5 +1,17 @@
 from datetime import datetime, timedelta
 
+import numpy as np
+
+# Intervalle maximal (100 ans, comme FSRS) : la facilité croît à chaque « Facile » et
+# l'intervalle finirait par dépasser les dates représentables (an 9999)
+MAX_INTERVAL = 36500
+
+def to_local_naive(moment: datetime) -> datetime:
+    """Les dates de l'application sont naïves en heure locale (datetime.now())."""
+    if moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
 def calculate_next_review(current_interval: int, current_ease: float, quality: str):
     """
     quality: 'forgot' (Oublié), 'hard' (Difficile), 'easy' (Facile)
@@ -9,9 +21,30 @@ def calculate_next_review(current_interval: int, current_ease: float, quality: s
     
     if quality == 'hard':
         new_ease = max(1.3, current_ease - 0.15)
-        new_interval = max(1, int(current_interval * 1.2))
+        new_interval = min(MAX_INTERVAL, max(1, int(current_interval * 1.2)))
     else: # 'easy'
         new_ease = current_ease + 0.15
-        new_interval = int(current_interval * current_ease)
+        new_interval = min(MAX_INTERVAL, int(current_interval * current_ease))
         
     return new_interval, new_ease, datetime.now() + timedelta(days=new_interval)
+
+def calculate_next_reviews(intervals, eases, qualities, reviewed_at):
+    """
+    Version vectorisée de calculate_next_review pour un lot de cartes (mêmes règles).
+    La prochaine révision est comptée depuis `reviewed_at` (datetimes naïfs) et non depuis maintenant.
+    Retourne des tableaux NumPy (intervalles, facilités, dates de prochaine révision).
+    """
+    intervals = np.asarray(intervals, dtype=np.int64)
+    eases = np.asarray(eases, dtype=np.float64)
+    qualities = np.asarray(qualities)
+    forgot = qualities == 'forgot'
+    hard = qualities == 'hard'
+
+    new_eases = np.where(forgot, eases, np.where(hard, np.maximum(1.3, eases - 0.15), eases + 0.15))
+    new_intervals = np.where(
+        forgot, 1,
+        np.where(hard, np.maximum(1, (intervals * 1.2).astype(np.int64)), (intervals * eases).astype(np.int64)),
+    )
+    new_intervals = np.minimum(new_intervals, MAX_INTERVAL)
+    next_dates = np.asarray(reviewed_at, dtype="datetime64[us]") + new_intervals.astype("timedelta64[D]")
+    return new_intervals, new_eases, next_dates
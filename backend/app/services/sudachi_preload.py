@@ -0,0 +1,5 @@
+# Importé par le forkserver du pool de tokenisation (voir tokenizer_pool._mp_context) :
+# le dictionnaire est chargé ici une seule fois, puis hérité par chaque worker forké.
+from .tokenizer_pool import shared_dictionary
+
+shared_dictionary()
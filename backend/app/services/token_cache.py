@@ -0,0 +1,67 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from .lru_cache import LRUCache
+
+
+class TokenCache:
+    """
+    Cache adressé par contenu des flux de tokens (surface, forme dictionnaire, lecture, POS).
+
+    Seule la sortie de Sudachi est mise en cache : statut et définitions, propres à
+    l'utilisateur et au dictionnaire, sont recalculés à chaque requête.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int = 0, namespace: str = ""):
+        self._cache = LRUCache(maxsize, max_bytes)
+        # Le namespace (mode de découpage, version du dictionnaire...) invalide les anciennes clés
+        self.namespace = namespace
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str):
+        return self._cache.get(self.key(text))
+
+    def put(self, text: str, tokens):
+        self._cache.put(self.key(text), tokens)
+
+    def clear(self):
+        self._cache.clear()
+
+    def load(self, path: str):
+        """Recharge un cache sauvegardé ; un fichier absent ou illisible est ignoré."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as f:
+                namespace, items = pickle.load(f)
+        except Exception as e:
+            logging.warning("Cache de tokens illisible (%s) : %s", path, e)
+            return
+        if namespace != self.namespace:
+            return
+        for key, tokens in items:
+            self._cache.put(key, tokens)
+
+    def save(self, path: str):
+        # Écriture dans un fichier temporaire propre à l'appel puis renommage atomique : un cache
+        # n'est jamais tronqué, même quand plusieurs workers s'arrêtent et sauvegardent en même temps
+        # (le dernier renommage l'emporte).
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(os.path.abspath(path)), prefix=".token_cache-", suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = f.name
+            try:
+                pickle.dump((self.namespace, self._cache.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                f.close()
+                os.unlink(tmp_path)
+                raise
+        os.replace(tmp_path, path)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
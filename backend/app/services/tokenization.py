@@ -0,0 +1,70 @@
+from importlib.metadata import version, PackageNotFoundError
+
+from fastapi.concurrency import run_in_threadpool
+from ..core.config import settings
+from .token_cache import TokenCache
+from .tokenizer_pool import SPLIT_MODE, TokenizerPool, shared_dictionary, tokenize_with
+
+# Tokenizer du processus de l'API, utilisé quand le pool est désactivé (TOKENIZER_WORKERS=0).
+# Créé au premier besoin : importer l'application ne charge pas le dictionnaire Sudachi.
+_tokenizer = None
+
+tokenizer_pool = TokenizerPool(
+    settings.tokenizer_workers, settings.tokenizer_max_pending, settings.tokenizer_chunk_chars
+)
+
+try:
+    _dictionary_version = version("sudachidict_core")
+except PackageNotFoundError:
+    _dictionary_version = "unknown"
+
+token_cache = TokenCache(
+    settings.token_cache_size,
+    settings.token_cache_max_mb * 1024 * 1024,
+    namespace=f"{SPLIT_MODE}:{_dictionary_version}",
+)
+
+
+def local_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = shared_dictionary().create()
+    return _tokenizer
+
+
+def _tokenize_local(text: str):
+    return tokenize_with(local_tokenizer(), text)
+
+
+async def warm_up_tokenizer():
+    """Charge le dictionnaire là où la tokenisation aura lieu : workers du pool ou processus de l'API."""
+    if tokenizer_pool.running:
+        await tokenizer_pool.warm_up()
+    else:
+        await run_in_threadpool(local_tokenizer)
+
+
+def tokenize_text(text: str, cache: bool = True):
+    """Retourne les tokens du texte sous forme de tuples (surface, forme dictionnaire, lecture, POS)."""
+    tokens = token_cache.get(text) if cache else None
+    if tokens is None:
+        if tokenizer_pool.running:
+            tokens = tokenizer_pool.tokenize(text)
+        else:
+            tokens = _tokenize_local(text)
+        if cache:
+            token_cache.put(text, tokens)
+    return tokens
+
+
+async def tokenize_text_async(text: str, cache: bool = True):
+    """Version asynchrone de `tokenize_text` : la tokenisation ne bloque pas la boucle d'événements."""
+    tokens = token_cache.get(text) if cache else None
+    if tokens is None:
+        if tokenizer_pool.running:
+            tokens = await tokenizer_pool.tokenize_async(text)
+        else:
+            tokens = await run_in_threadpool(_tokenize_local, text)
+        if cache:
+            token_cache.put(text, tokens)
+    return tokens
@@ -0,0 +1,246 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sudachipy import tokenizer, dictionary
+from .sentences import SENTENCE_END, split_sentences
+
+SPLIT_MODE = "A"
+
+def _pack(sentences, max_chars: int, length):
+    """Regroupe des phrases consécutives en paquets d'environ `max_chars` caractères."""
+    packs, current, size = [], [], 0
+    for sentence in sentences:
+        sentence_size = length(sentence)
+        if current and size + sentence_size > max_chars:
+            packs.append(current)
+            current, size = [], 0
+        current.append(sentence)
+        size += sentence_size
+    if current:
+        packs.append(current)
+    return packs
+
+
+def chunk_text(text: str, max_chars: int):
+    """Regroupe des phrases entières en morceaux d'environ `max_chars` caractères."""
+    return ["".join(pack) for pack in _pack(split_sentences(text), max_chars, len)]
+
+
+def split_token_sentences(tokens):
+    """Découpe une liste de tokens après chaque token qui termine une phrase (même délimiteurs)."""
+    sentences, current = [], []
+    for token in tokens:
+        current.append(token)
+        if SENTENCE_END.search(token[0]):
+            sentences.append(current)
+            current = []
+    if current:
+        sentences.append(current)
+    return sentences
+
+
+def chunk_tokens(tokens, max_chars: int):
+    """
+    Équivalent de `chunk_text` pour un texte déjà tokenisé : des phrases entières, jamais
+    coupées au milieu d'un composé, en morceaux d'environ `max_chars` caractères.
+    """
+    def length(sentence):
+        return sum(len(token[0]) for token in sentence)
+
+    return [
+        [token for sentence in pack for token in sentence]
+        for pack in _pack(split_token_sentences(tokens), max_chars, length)
+    ]
+
+
+def tokenize_with(tokenizer_obj, text: str):
+    """Tokens du texte sous forme de tuples (surface, forme dictionnaire, lecture, POS)."""
+    mode = getattr(tokenizer.Tokenizer.SplitMode, SPLIT_MODE)
+    return [
+        (t.surface(), t.dictionary_form(), t.reading_form(), t.part_of_speech())
+        for t in tokenizer_obj.tokenize(text, mode)
+    ]
+
+
+# --- Dictionnaire Sudachi : chargé une fois par processus, au premier besoin ---
+# SudachiPy projette system.dic en mémoire (mmap) : les pages du fichier sont partagées
+# par tous les processus via le cache du système ; seules les structures construites au
+# chargement (~40 Mo) sont propres au processus, ou partagées après un fork.
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+
+def shared_dictionary():
+    """Dictionnaire Sudachi du processus ; les tokenizers en sont créés par `.create()`."""
+    global _dictionary
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                _dictionary = dictionary.Dictionary()
+    return _dictionary
+
+
+# Module importé par le forkserver du pool : il charge le dictionnaire avant de forker les workers
+PRELOAD_MODULE = __name__.rpartition(".")[0] + ".sudachi_preload"
+
+
+# --- Côté worker : le dictionnaire vient du forkserver (copie sur écriture) ---
+_worker_tokenizer = None
+
+
+def _init_worker():
+    global _worker_tokenizer
+    _worker_tokenizer = shared_dictionary().create()
+
+
+def _tokenize_chunk(text: str):
+    return tokenize_with(_worker_tokenizer, text)
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def _mp_context():
+    """
+    forkserver plutôt que fork : on ne duplique pas les threads du serveur. Le forkserver est
+    un processus neuf qui précharge le dictionnaire une fois ; chaque worker en est un fork
+    et partage ses pages. spawn (un chargement par worker) là où forkserver n'existe pas.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([PRELOAD_MODULE])
+    return context
+
+
+class TokenizerBusy(Exception):
+    """La file d'attente du pool est pleine : la requête doit être refusée (503)."""
+
+
+class TokenizerPool:
+    """
+    Tokenisation dans un pool de processus, hors du GIL de l'API.
+
+    Les longs textes sont découpés aux fins de phrase, tokenisés en parallèle puis
+    réassemblés dans l'ordre. Le nombre de morceaux en attente est borné par `max_pending`.
+    Si un worker meurt (OOM killer, crash de Sudachi), le pool entier est cassé : il est
+    recréé et les morceaux du texte sont renvoyés une fois.
+    """
+
+    def __init__(self, workers: int, max_pending: int, chunk_chars: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.chunk_chars = chunk_chars
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.broken = 0
+        self.restarts = 0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+        )
+
+    def start(self):
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = self._create_executor()
+
+    def _restart(self, broken):
+        """Remplace le pool cassé `broken`, sauf si une autre requête l'a déjà fait."""
+        with self._lock:
+            self.broken += 1
+            if self._executor is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+            self.restarts += 1
+
+    async def warm_up(self):
+        """Démarre les workers (processus créés à la demande) : la première requête ne les attend pas."""
+        if self._executor is None:
+            return
+        futures = [asyncio.wrap_future(self._executor.submit(_worker_pid)) for _ in range(self.workers)]
+        await asyncio.gather(*futures)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _admit(self, chunks):
+        with self._lock:
+            # Un texte plus long que la file entière passe tout de même si elle est vide
+            if self._pending and self._pending + len(chunks) > self.max_pending:
+                self.rejected += 1
+                raise TokenizerBusy("Tokeniseur surchargé, réessayez plus tard")
+            self._pending += len(chunks)
+            self.submitted += len(chunks)
+
+    def _release(self, chunks):
+        with self._lock:
+            self._pending -= len(chunks)
+
+    def tokenize(self, text: str):
+        chunks = chunk_text(text, self.chunk_chars)
+        self._admit(chunks)
+        try:
+            for attempt in range(2):
+                executor = self._executor
+                try:
+                    futures = [executor.submit(_tokenize_chunk, chunk) for chunk in chunks]
+                    tokens = []
+                    for future in futures:
+                        tokens.extend(future.result())
+                    return tokens
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt:
+                        raise
+        finally:
+            self._release(chunks)
+
+    async def tokenize_async(self, text: str):
+        """Comme `tokenize`, mais attend les workers sans bloquer la boucle d'événements."""
+        chunks = chunk_text(text, self.chunk_chars)
+        self._admit(chunks)
+        try:
+            for attempt in range(2):
+                executor = self._executor
+                try:
+                    futures = [asyncio.wrap_future(executor.submit(_tokenize_chunk, chunk)) for chunk in chunks]
+                    tokens = []
+                    for result in await asyncio.gather(*futures):
+                        tokens.extend(result)
+                    return tokens
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt:
+                        raise
+        finally:
+            self._release(chunks)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self.running else 0,
+            "pending_chunks": self._pending,
+            "max_pending": self.max_pending,
+            "submitted_chunks": self.submitted,
+            "rejected": self.rejected,
+            "broken": self.broken,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+
+from ..core.metrics import metrics
+
+
+class Warmup:
+    """
+    Préchauffage de l'API, lancé par le lifespan une fois le serveur démarré.
+
+    Les étapes (coroutines indépendantes) s'exécutent ensemble, en tâche de fond : le serveur
+    répond déjà pendant ce temps (recherches par SQL tant que l'index n'est pas chargé).
+    GET /ready renvoie 503 jusqu'à ce que toutes aient réussi.
+    """
+
+    def __init__(self):
+        self._steps = []
+        self._task = None
+        self.seconds = {}
+        self.errors = {}
+        self.done = False
+
+    def step(self, name: str, func):
+        self._steps.append((name, func))
+
+    @property
+    def ready(self) -> bool:
+        return self.done and not self.errors
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run_step(self, name: str, func):
+        start = time.perf_counter()
+        try:
+            with metrics.timer("warmup_step", step=name):
+                await func()
+        except Exception as e:
+            logging.exception("Échec du préchauffage : %s", name)
+            self.errors[name] = str(e)
+        self.seconds[name] = time.perf_counter() - start
+        logging.info("Préchauffage %s : %.2f s", name, self.seconds[name])
+
+    async def _run(self):
+        await asyncio.gather(*(self._run_step(name, func) for name, func in self._steps))
+        self.done = True
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "steps": {
+                name: {
+                    "done": name in self.seconds,
+                    "seconds": round(self.seconds.get(name, 0.0), 3),
+                    **({"error": self.errors[name]} if name in self.errors else {}),
+                }
+                for name, _ in self._steps
+            },
+        }
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "seconds": {name: round(seconds, 3) for name, seconds in self.seconds.items()}}
+
+
+warmup = Warmup()
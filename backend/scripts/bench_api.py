@@ -0,0 +1,273 @@
+"""
+Suite de benchmarks de l'API : dictionnaire importé depuis data/term_bank_*.json, decks
+synthétiques de 1k à 100k cartes, latence et débit de l'analyse, de la file de révision
+et de l'envoi de révisions.
+
+Usage (depuis backend/) :
+    python -m scripts.bench_api [--decks 1000 10000 100000] [--banks 10] [--requests 100]
+                                [--output resultats.json] [--baseline reference.json --tolerance 0.25]
+                                [--database-url URL --i-know-this-wipes-cards]
+
+L'API tourne dans ce processus (uvicorn dans un thread) sur une base SQLite jetable ;
+le schéma est créé par les migrations avant l'import du dictionnaire. DATABASE_URL
+n'est jamais lu : une autre base se donne par --database-url, avec
+--i-know-this-wipes-cards puisque ses cartes sont remplacées par les decks.
+Avec --baseline, le script échoue (code 1) si le p95 d'un scénario dépasse celui de
+la référence de plus de --tolerance : à lancer avant un déploiement.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+
+def database_arguments(parser):
+    parser.add_argument("--database-url", help="base à utiliser au lieu d'une base jetable (cartes supprimées)")
+    parser.add_argument("--i-know-this-wipes-cards", action="store_true", help="confirme --database-url")
+    return parser
+
+
+# L'API lit DATABASE_URL à l'import de app.db.base : la base est fixée avant, en écrasant
+# celle de l'environnement (ou du .env), qui pourrait être la vraie. Les processus enfants
+# (__mp_main__) héritent de la variable et ne recréent pas de dossier.
+_TMP_DIR = None
+if __name__ == "__main__":
+    _args, _ = database_arguments(argparse.ArgumentParser(add_help=False)).parse_known_args()
+    if _args.database_url:
+        if not _args.i_know_this_wipes_cards:
+            sys.exit("--database-url : les cartes de cette base seront supprimées, ajouter --i-know-this-wipes-cards")
+        os.environ["DATABASE_URL"] = _args.database_url
+    else:
+        _TMP_DIR = tempfile.mkdtemp(prefix="bench_api_")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_TMP_DIR, 'bench.db')}"
+
+import json
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+import uvicorn
+from sqlalchemy import delete, insert, select
+
+from app.core.metrics import metrics
+from app.db.base import engine
+from app.db.init_db import init_models
+from app.main import app
+from app.models.card import UserCard, CardContext
+from app.models.dictionary import DictionaryEntry
+from app.services.known_words import known_words
+from app.services.warmup import warmup
+from scripts.bench_db import SENTENCES
+from scripts.import_jmdict import import_yomitan_json, bank_number
+
+BATCH_SIZE = 5000
+STAGES = ("tokenize", "lookup", "known_words", "serialize")
+
+
+def seed_dictionary(data_dir, banks):
+    """Importe les `banks` premiers term_bank (tous si None) avec l'importeur habituel."""
+    with engine.connect() as conn:
+        if conn.execute(select(DictionaryEntry.id).limit(1)).first() is not None:
+            print("Dictionnaire déjà présent : import ignoré")
+            return
+    files = sorted((f for f in os.listdir(data_dir) if f.startswith("term_bank")), key=bank_number)
+    if banks is not None:
+        files = files[:banks]
+    with tempfile.TemporaryDirectory() as subset:
+        for file_name in files:
+            os.symlink(os.path.abspath(os.path.join(data_dir, file_name)), os.path.join(subset, file_name))
+        import_yomitan_json(subset)
+
+
+def seed_deck(size, rng):
+    """Remplace les cartes par un deck synthétique : ~30 % dues, le reste étalé sur 90 jours."""
+    with engine.begin() as conn:
+        conn.execute(delete(CardContext))
+        conn.execute(delete(UserCard))
+        lemmas = conn.execute(select(DictionaryEntry.kanji).limit(50000)).scalars().all()
+        now = datetime.now()
+        for offset in range(0, size, BATCH_SIZE):
+            cards, contexts = [], []
+            for card_id in range(offset + 1, min(size, offset + BATCH_SIZE) + 1):
+                lemma = rng.choice(lemmas)
+                due = now - timedelta(days=rng.random() * 10) if rng.random() < 0.3 else now + timedelta(days=rng.random() * 90)
+                interval = rng.randint(1, 60)
+                cards.append({
+                    "id": card_id, "word_text": lemma, "reading": "", "lemma": lemma,
+                    "definition": "bench", "status": "learning", "interval": interval,
+                    "ease_factor": round(rng.uniform(1.3, 3.0), 2), "next_review_date": due,
+                    "last_review_date": due - timedelta(days=interval),
+                })
+                contexts.append({"card_id": card_id, "sentence_text": rng.choice(SENTENCES)})
+            conn.execute(insert(UserCard), cards)
+            conn.execute(insert(CardContext), contexts)
+        due_ids = conn.execute(
+            select(UserCard.id).where(UserCard.next_review_date <= now).order_by(UserCard.id)
+        ).scalars().all()
+    known_words.clear()
+    return due_ids
+
+
+class Server:
+    """L'application servie par uvicorn dans un thread, sur un port libre."""
+
+    def __init__(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        # Mesures sur une API préchauffée (index du dictionnaire, workers du tokeniseur)
+        while not (self._server.started and warmup.done):
+            time.sleep(0.05)
+        if warmup.errors:
+            raise RuntimeError(f"Préchauffage en échec : {warmup.errors}")
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def run_scenario(send, count, concurrency):
+    """Envoie `count` requêtes avec `concurrency` clients ; latences, débit et requêtes SQL."""
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "http"):
+            local.http = requests.Session()
+        start = time.perf_counter()
+        response = send(local.http, i)
+        response.raise_for_status()
+        return time.perf_counter() - start, int(response.headers.get("x-sql-queries", 0))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    return {
+        "requests": count,
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "sql_per_request": round(float(np.mean([queries for _, queries in results])), 1),
+    }
+
+
+def bench_deck(url, size, args, rng):
+    due_ids = seed_deck(size, rng)
+    metrics.clear()
+    results = {}
+
+    # Textes tous différents : le cache de tokens ne fausse pas la mesure de Sudachi
+    texts = ["".join(rng.choices(SENTENCES, k=rng.randint(5, 30))) + f"第{i}回。" for i in range(args.requests)]
+    results["analysis"] = run_scenario(
+        lambda http, i: http.post(f"{url}/api/test-nlp", json={"text": texts[i]}),
+        args.requests, args.concurrency,
+    )
+
+    # Curseurs relevés hors mesure : les requêtes mesurées lisent des pages à toute profondeur
+    cursors, cursor = [None], None
+    with requests.Session() as http:
+        while len(cursors) < args.requests:
+            cursor = http.get(f"{url}/api/reviews", params={"limit": 50, "cursor": cursor}).json()["next_cursor"]
+            if cursor is None:
+                break
+            cursors.append(cursor)
+    results["review_fetch"] = run_scenario(
+        lambda http, i: http.get(f"{url}/api/reviews", params={"limit": 50, "cursor": cursors[i % len(cursors)]}),
+        args.requests, args.concurrency,
+    )
+
+    # Lots de 50 révisions sur des cartes dues distinctes (la date les rend toutes nouvelles)
+    batches = [due_ids[i:i + 50] for i in range(0, len(due_ids), 50)] or [[]]
+
+    def submit(http, i):
+        reviewed_at = datetime.now().isoformat()
+        return http.post(f"{url}/api/reviews/batch", json=[
+            {"card_id": card_id, "quality": rng.choice(["forgot", "hard", "easy"]), "reviewed_at": reviewed_at}
+            for card_id in batches[i % len(batches)]
+        ])
+
+    results["review_submit"] = run_scenario(submit, args.requests, args.concurrency)
+
+    snapshot = metrics.snapshot()
+    results["analysis_stages_p50_ms"] = {
+        stage: round(snapshot.get(f"analysis_stage{{stage={stage}}}", {}).get("p50", 0.0) * 1000, 2)
+        for stage in STAGES
+    }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Liste des scénarios dont le p95 dépasse la référence de plus de `tolerance`."""
+    regressions = []
+    for deck, scenarios in results.items():
+        for name, result in scenarios.items():
+            reference = baseline.get(deck, {}).get(name, {})
+            if "p95_ms" in result and "p95_ms" in reference and result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{deck} cartes / {name} : p95 {result['p95_ms']} ms (référence {reference['p95_ms']} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default="data/")
+    parser.add_argument("--banks", type=int, default=None, help="nombre de term_bank importés (défaut : tous)")
+    parser.add_argument("--decks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=100, help="requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="écrit les résultats en JSON (future référence)")
+    parser.add_argument("--baseline", help="résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    database_arguments(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    init_models()
+    seed_dictionary(args.data_dir, args.banks)
+    results = {}
+    with Server() as server:
+        for size in args.decks:
+            results[str(size)] = bench_deck(server.url, size, args, rng)
+
+    print(f"{'cartes':>8} {'scénario':>14} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'SQL/req':>8}")
+    for deck, scenarios in results.items():
+        for name, result in scenarios.items():
+            if "p95_ms" in result:
+                print(f"{deck:>8} {name:>14} {result['rps']:>8} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['sql_per_request']:>8}")
+        stages = scenarios["analysis_stages_p50_ms"]
+        print(f"{'':>8} {'étapes (p50)':>14} " + ", ".join(f"{stage} {ms} ms" for stage, ms in stages.items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        status = 1 if regressions else 0
+    return status
+
+
+if __name__ == "__main__":
+    try:
+        status = main()
+    finally:
+        if _TMP_DIR:
+            shutil.rmtree(_TMP_DIR, ignore_errors=True)
+    sys.exit(status)
@@ -0,0 +1,89 @@
+"""
+Couverture du dictionnaire sur un texte réel : ancienne recherche exacte
+(`kanji == lemme OR reading == lemme`) contre les graphies de `dictionary_variants`
+et la fusion des composés (`match_tokens`).
+
+Usage (depuis backend/, dictionnaire importé) : python -m scripts.bench_coverage [--text-file texte.txt]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, or_
+
+from app.core.config import settings
+from app.db.base import SessionLocal, AsyncSessionLocal, async_engine
+from app.models.dictionary import DictionaryEntry
+from app.services.dictionary_index import dictionary_index
+from app.services.dictionary_lookup import match_tokens
+from app.services.tokenization import tokenize_text
+
+SAMPLE = """吾輩は猫である。名前はまだ無い。どこで生れたかとんと見当がつかぬ。
+何でも薄暗いじめじめした所でニャーニャー泣いていた事だけは記憶している。
+前向き推論は人工知能の基本的な手法の一つだ。彼はその問題を慎重に取り扱った。
+東京駅の近くでラーメンを食べました。ネコがベッドの上で寝ている。
+日本語を毎日勉強することができるようになりたい。彼女はスマホでメールを送った。
+経済成長率が低下しつつあると政府は発表した。このパソコンはもう古くなってしまった。"""
+
+# Tokens sans entrée attendue : ponctuation et blancs
+SKIPPED = {"補助記号", "空白"}
+
+
+def exact_coverage(tokens):
+    """Nombre de tokens trouvés par l'ancienne recherche, une requête par lemme."""
+    db = SessionLocal()
+    try:
+        found = {}
+        for lemma in {lemma for _, lemma, _, _ in tokens}:
+            row = db.execute(
+                select(DictionaryEntry.id)
+                .where(or_(DictionaryEntry.kanji == lemma, DictionaryEntry.reading == lemma))
+                .limit(1)
+            ).first()
+            found[lemma] = row is not None
+        return sum(1 for _, lemma, _, pos in tokens if pos[0] not in SKIPPED and found[lemma])
+    finally:
+        db.close()
+
+
+async def timed_match(tokens):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        words = await match_tokens(db, tokens, settings.dictionary_compound_span)
+        return words, (time.perf_counter() - start) * 1000
+
+
+async def main(text):
+    tokens = tokenize_text(text, cache=False)
+    content = sum(1 for _, _, _, pos in tokens if pos[0] not in SKIPPED)
+    old = exact_coverage(tokens)
+
+    dictionary_index.invalidate()
+    _, sql_ms = await timed_match(tokens)
+    db = SessionLocal()
+    try:
+        dictionary_index.build(db)
+    finally:
+        db.close()
+    words, index_ms = await timed_match(tokens)
+    await async_engine.dispose()
+
+    covered = sum(end - start for start, end, _, _, definition in words
+                  if definition is not None and tokens[start][3][0] not in SKIPPED)
+    compounds = [(start, end, key) for start, end, key, _, _ in words if end - start > 1]
+    print(f"{content} tokens de contenu")
+    print(f"recherche exacte      : {old:>5} ({old / content:.1%})")
+    print(f"graphies + composés   : {covered:>5} ({covered / content:.1%})")
+    print(f"{len(compounds)} composés fusionnés : " + ", ".join(key for _, _, key in compounds[:15]))
+    print(f"match_tokens : {sql_ms:.1f} ms en SQL, {index_ms:.1f} ms avec l'index en mémoire")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--text-file", help="texte japonais (UTF-8) ; défaut : extrait intégré")
+    args = parser.parse_args()
+    text = SAMPLE
+    if args.text_file:
+        with open(args.text_file, encoding="utf-8") as f:
+            text = f.read()
+    asyncio.run(main(text))
@@ -0,0 +1,113 @@
+"""
+Benchmark de la recherche dans le dictionnaire : une requête par token (ancienne méthode),
+la recherche SQL groupée de `lookup_definitions` et l'index en mémoire.
+
+Usage (depuis backend/) : python -m scripts.bench_lookup [--banks 3] [--sizes 100 1000 5000 20000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.dictionary import DictionaryEntry, DictionaryVariant, DictionaryVersion
+from app.services.dictionary_index import DictionaryIndex
+from app.services.dictionary_lookup import lookup_definitions
+from scripts.import_jmdict import extract_text, rebuild_variants
+
+
+def seed(db, data_dir, banks):
+    files = sorted(f for f in os.listdir(data_dir) if f.startswith('term_bank'))[:banks]
+    rows = []
+    for file_name in files:
+        with open(os.path.join(data_dir, file_name), 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                rows.append({
+                    "kanji": str(entry[0]),
+                    "reading": str(entry[1]),
+                    "definitions": extract_text(entry[5]),
+                })
+    db.bulk_insert_mappings(DictionaryEntry, rows)
+    db.commit()
+    with db.get_bind().begin() as conn:
+        rebuild_variants(conn)
+    return rows
+
+
+def per_token_lookup(db, lemmas):
+    definitions = {}
+    for lemma in lemmas:
+        dict_entry = db.query(DictionaryEntry).filter(
+            (DictionaryEntry.kanji == lemma) | (DictionaryEntry.reading == lemma)
+        ).first()
+        definitions[lemma] = dict_entry.definitions if dict_entry else None
+    return definitions
+
+
+def synthetic_tokens(rows, count, rng):
+    # Un texte réel répète beaucoup ses lemmes : on tire dans un vocabulaire restreint,
+    # avec ~10 % de formes absentes du dictionnaire
+    vocabulary = [r["kanji"] for r in rng.sample(rows, 2000)] + [f"未知{i}" for i in range(200)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return rng.choices(vocabulary, weights=weights, k=count)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+async def timed_async(fn, *args):
+    start = time.perf_counter()
+    await fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default="data/")
+    parser.add_argument("--banks", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = create_engine(f"sqlite:///{path}")
+        # DictionaryIndex.build lit aussi la version du dictionnaire (table vide : version 0)
+        tables = [DictionaryEntry.__table__, DictionaryVariant.__table__, DictionaryVersion.__table__]
+        Base.metadata.create_all(bind=engine, tables=tables)
+        db = sessionmaker(bind=engine)()
+        # lookup_definitions s'exécute sur la session asynchrone de l'API
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async_db = async_sessionmaker(async_engine)()
+        rows = seed(db, args.data_dir, args.banks)
+        print(f"{len(rows)} entrées chargées depuis {args.banks} fichiers")
+
+        index = DictionaryIndex(cache_size=20000)
+        index.build(db)
+        print(f"Index en mémoire : {index.stats()['index_bytes'] / 1e6:.1f} Mo en {index.build_seconds:.2f} s")
+
+        rng = random.Random(42)
+        print(f"{'tokens':>8} {'uniques':>8} {'par token (ms)':>15} {'groupé (ms)':>12} {'index (ms)':>11}")
+        for size in args.sizes:
+            lemmas = synthetic_tokens(rows, size, rng)
+            naive = timed(per_token_lookup, db, lemmas)
+            batched = await timed_async(lookup_definitions, async_db, lemmas)
+            in_memory = timed(index.lookup_many, lemmas)
+            print(f"{size:>8} {len(set(lemmas)):>8} {naive:>15.1f} {batched:>12.1f} {in_memory:>11.1f}")
+        print(f"Taux de hit du LRU : {index.stats()['cache']['hit_ratio']:.1%}")
+        db.close()
+        await async_db.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,226 @@
+"""
+Mesure du démarrage de l'API : import de app.main, délai avant la première réponse (/)
+et avant la fin du préchauffage (/ready), puis mémoire de chaque processus (Linux, /proc).
+
+Usage (depuis backend/) :
+    python -m scripts.bench_startup [--workers 1 2 4] [--runs 3] [--app-dir .]
+                                    [--database-url sqlite+aiosqlite:////chemin/japanese_app.db]
+
+Chaque mesure lance `uvicorn app.main:app --workers N` dans un sous-processus. Sans
+--database-url (ni DATABASE_URL), une base SQLite vide est créée par `python -m app.db.init_db` :
+l'index du dictionnaire est alors vide, à réserver aux mesures d'import et de mémoire de base.
+--app-dir permet de mesurer une autre version de l'application (ex. un `git worktree` de référence).
+Un serveur sans /ready (404) est considéré prêt dès sa première réponse.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from scripts.bench_db import SENTENCES
+
+ROLES = ("uvicorn", "worker", "forkserver", "tokenizer", "resource_tracker")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds(app_dir, env) -> float:
+    """Durée de `import app.main` dans un interpréteur neuf."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=app_dir, env=env, check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def process_tree(root: int) -> dict:
+    """{pid: pid parent} des descendants de `root` (root compris), lus dans /proc."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # Le nom du processus est entre parenthèses et peut contenir des espaces
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError):
+                continue
+    tree, frontier = {root: None}, [root]
+    while frontier:
+        current = frontier.pop()
+        for pid, parent in parents.items():
+            if parent == current and pid not in tree:
+                tree[pid] = current
+                frontier.append(pid)
+    return tree
+
+
+def memory(pid: int) -> dict:
+    """RSS, PSS (pages partagées réparties entre processus) et mémoire anonyme, en Mo."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Anonymous:"):
+                values[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    return values
+
+
+def cmdline(pid) -> str:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode(errors="replace")
+
+
+def role(pid: int, parent, root: int, workers: int) -> str:
+    command = cmdline(pid)
+    if "resource_tracker" in command:
+        return "resource_tracker"
+    if "forkserver" in command:
+        # Les workers forkés par le forkserver gardent sa ligne de commande
+        return "tokenizer" if "forkserver" in cmdline(parent) else "forkserver"
+    if pid == root:
+        return "uvicorn"
+    if parent == root and workers > 1:
+        return "worker"
+    return "tokenizer"
+
+
+def wait_for(url, deadline, accept_404=False):
+    """Temps écoulé quand `url` répond 200 (ou 404 si accepté), None au-delà de `deadline`."""
+    while time.perf_counter() < deadline:
+        try:
+            response = requests.get(url, timeout=1)
+            if response.status_code == 200 or (accept_404 and response.status_code == 404):
+                return response
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def measure(app_dir, workers, env, requests_count, timeout):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=app_dir, env=env,
+    )
+    try:
+        deadline = started + timeout
+        if wait_for(f"{url}/", deadline) is None:
+            raise RuntimeError(f"pas de réponse sur {url}/ après {timeout} s")
+        live = time.perf_counter() - started
+        ready_response = wait_for(f"{url}/ready", deadline, accept_404=True)
+        if ready_response is None:
+            raise RuntimeError(f"{url}/ready toujours en préchauffage après {timeout} s")
+        ready = time.perf_counter() - started if ready_response.status_code == 200 else live
+        steps = {
+            name: step["seconds"] for name, step in ready_response.json().get("steps", {}).items()
+        } if ready_response.status_code == 200 else {}
+
+        # Premières analyses : chemin de tokenisation et de recherche réellement parcouru
+        with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+            first = list(pool.map(
+                lambda i: _timed_post(f"{url}/api/test-nlp", {"text": SENTENCES[i % len(SENTENCES)] + f"第{i}回。"}),
+                range(requests_count),
+            ))
+
+        processes = {}
+        for pid, parent in process_tree(server.pid).items():
+            try:
+                processes[pid] = {"role": role(pid, parent, server.pid, workers), **memory(pid)}
+            except OSError:
+                continue
+        return {"live_s": live, "ready_s": ready, "steps": steps, "first_requests_ms": first, "processes": processes}
+    finally:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def _timed_post(url, payload):
+    start = time.perf_counter()
+    requests.post(url, json=payload, timeout=120).raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(runs):
+    """Médianes des runs : délais, première analyse, et mémoire par rôle de processus."""
+    result = {
+        "live_s": round(float(np.median([run["live_s"] for run in runs])), 2),
+        "ready_s": round(float(np.median([run["ready_s"] for run in runs])), 2),
+        "first_request_max_ms": round(float(np.median([max(run["first_requests_ms"]) for run in runs])), 1),
+        "warmup_steps_s": {
+            name: round(float(np.median([run["steps"][name] for run in runs])), 2) for name in runs[0]["steps"]
+        },
+        "roles": {},
+    }
+    for name in ROLES:
+        per_run = [[p for p in run["processes"].values() if p["role"] == name] for run in runs]
+        if not any(per_run):
+            continue
+        result["roles"][name] = {
+            "count": int(np.median([len(processes) for processes in per_run])),
+            "rss_mb": round(float(np.median([np.mean([p["rss"] for p in ps]) for ps in per_run if ps])), 1),
+            "anon_mb": round(float(np.median([np.mean([p["anonymous"] for p in ps]) for ps in per_run if ps])), 1),
+        }
+    result["total_pss_mb"] = round(float(np.median([sum(p["pss"] for p in run["processes"].values()) for run in runs])), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app-dir", default=".", help="dossier backend/ de la version mesurée")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=8, help="analyses envoyées après le démarrage (au moins 1)")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="écrit les résultats en JSON")
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    env = {**os.environ, "PYTHONPATH": app_dir}
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp_dir:
+        if args.database_url:
+            env["DATABASE_URL"] = args.database_url
+        else:
+            env["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+            subprocess.run([sys.executable, "-m", "app.db.init_db"], cwd=app_dir, env=env, check=True, capture_output=True)
+
+        results = {"import_s": round(float(np.median([import_seconds(app_dir, env) for _ in range(args.runs)])), 2)}
+        print(f"import app.main : {results['import_s']} s")
+        for workers in args.workers:
+            runs = [measure(app_dir, workers, env, args.requests, args.timeout) for _ in range(args.runs)]
+            results[str(workers)] = summarize(runs)
+
+    print(f"{'workers':>7} {'/ (s)':>7} {'/ready (s)':>10} {'1re analyse (ms)':>16} {'PSS total (Mo)':>14}  RSS moyen par rôle (Mo)")
+    for workers in args.workers:
+        r = results[str(workers)]
+        roles = ", ".join(f"{name} x{info['count']} {info['rss_mb']} (anon {info['anon_mb']})" for name, info in r["roles"].items())
+        print(f"{workers:>7} {r['live_s']:>7} {r['ready_s']:>10} {r['first_request_max_ms']:>16} {r['total_pss_mb']:>14}  {roles}")
+        if r["warmup_steps_s"]:
+            print(f"{'':>7} préchauffage : " + ", ".join(f"{name} {s} s" for name, s in r["warmup_steps_s"].items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
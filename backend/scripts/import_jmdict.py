@@ -1,67 +1,34 @@
+"""
+Import des term_bank Yomitan (JMdict) dans la table `dictionary`.
+
+Usage (depuis backend/) : python -m scripts.import_jmdict [--changed-only] [--workers N] [--variants-only]
+Le schéma doit exister au préalable : python -m app.db.init_db (migrations alembic).
+
+Les fichiers sont lus élément par élément et aplatis en parallèle (un fichier par processus),
+puis écrits par lots dans une seule transaction. Chaque entrée est insérée ou mise à jour
+selon sa clé naturelle (kanji, lecture, séquence) : relancer l'import ne crée pas de doublons.
+La table `dictionary_variants` (graphies normalisées -> entrée) est ensuite recalculée et
+la version du dictionnaire incrémentée, dans la même transaction : chaque worker de l'API
+reconstruit alors son index (POST /api/dictionary/reload n'atteint qu'un seul worker).
+"""
+import argparse
+import hashlib
 import json
 import os
-from sqlalchemy.orm import Session
-from app.db.base import SessionLocal, engine
-from app.models.dictionary import DictionaryEntry
-
-def import_yomitan_json():
-    # Chemin vers le dossier où vous avez décompressé le ZIP
-    data_dir = "data/" 
-    db = SessionLocal()
-    
-    # Trouver tous les fichiers term_bank
-    files = [f for f in os.listdir(data_dir) if f.startswith('term_bank')]
-    
-    if not files:
-        print("Aucun fichier term_bank_*.json trouvé dans le dossier data/")
-        return
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from sqlalchemy import select, delete, update
+from app.core.config import settings
+from app.db.base import engine
+from app.models.dictionary import DictionaryEntry, DictionaryVariant, DictionaryBank, DictionaryVersion
+from app.services.kana import entry_variants
+
+BATCH_SIZE = 5000
+_SEPARATORS = re.compile(r"[\s,]*")
 
-    print(f"Début de l'importation de {len(files)} fichiers JSON...")
-
-    for file_name in files:
-        file_path = os.path.join(data_dir, file_name)
-        with open(file_path, 'r', encoding='utf-8') as f:
-            entries = json.load(f)
-            
-            entries_to_add = []
-            for entry in entries:
-                kanji = entry[0]
-                reading = entry[1]
-                definitions_list = entry[5]
-                
-                # --- NOUVELLE LOGIQUE DE NETTOYAGE ---
-                clean_defs = []
-                if isinstance(definitions_list, list):
-                    for d in definitions_list:
-                        if isinstance(d, str):
-                            clean_defs.append(d)
-                        elif isinstance(d, dict):
-                            # Pour le format "Structured Content" de Yomitan
-                            # On récupère récursivement le texte si présent
-                            content = d.get('content') or d.get('text') or ""
-                            if isinstance(content, str):
-                                clean_defs.append(content)
-                            elif isinstance(content, list):
-                                # Parfois content est lui-même une liste
-                                clean_defs.append(" ".join([str(i) for i in content if isinstance(i, str)]))
-                
-                definitions_str = " / ".join(clean_defs) if clean_defs else "No definition"
-                # -------------------------------------
-
-                db_entry = DictionaryEntry(
-                    kanji=kanji,
-                    reading=reading,
-                    definitions=definitions_str
-                )
-                entries_to_add.append(db_entry)
-
-            # Insertion par lot pour la rapidité
-            db.bulk_save_objects(entries_to_add)
-            db.commit()
-            print(f"Importé : {file_name}")
-
-    db.close()
-    print("Importation terminée avec succès !")
 
 def extract_text(data):
     """Extrait récursivement tout le texte d'une structure Yomitan complexe."""
@@ -75,55 +42,230 @@ def extract_text(data):
         return extract_text(content)
     return ""
 
-def import_yomitan_json():
-    data_dir = "data/" 
-    db = SessionLocal()
-    
-    files = [f for f in os.listdir(data_dir) if f.startswith('term_bank')]
+
+def iter_bank(file_path, chunk_size=1 << 16):
+    """Parcourt un term_bank entrée par entrée sans charger tout le tableau JSON en mémoire."""
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{file_path} n'est pas un tableau JSON")
+        pos, eof = 1, False
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                entry, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Entrée coupée par la fin du bloc lu : on complète le tampon
+                if eof:
+                    raise
+                more = f.read(chunk_size)
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield entry
+
+
+def entry_key(entry):
+    # Index 0: Kanji, Index 1: Reading, Index 6: Numéro de séquence JMdict
+    return str(entry[0]), str(entry[1]), entry[6]
+
+
+def entry_definitions(entry):
+    """Texte des définitions d'une entrée ; les entrées « forms » ne listent que des graphies."""
+    if entry[2] == "forms" or not isinstance(entry[5], list):
+        return []
+    return [text for text in (extract_text(item).strip() for item in entry[5]) if text]
+
+
+def parse_bank(file_path, next_path=None):
+    """
+    Aplatit un term_bank en lignes (kanji, lecture, séquence, définitions).
+
+    Les entrées consécutives partageant la même clé naturelle (un sens par catégorie
+    grammaticale dans JMdict) sont fusionnées. Un groupe commencé en fin de fichier est
+    complété avec le début du fichier suivant : il appartient au fichier où il commence.
+    """
+    rows, current, senses = [], None, []
+    for entry in iter_bank(file_path):
+        key = entry_key(entry)
+        if key != current:
+            if current is not None:
+                rows.append((*current, senses))
+            current, senses = key, []
+        senses.extend(entry_definitions(entry))
+
+    if current is not None and next_path:
+        for entry in iter_bank(next_path):
+            if entry_key(entry) != current:
+                break
+            senses.extend(entry_definitions(entry))
+    if current is not None:
+        rows.append((*current, senses))
+
+    return [
+        {"kanji": kanji, "reading": reading, "sequence": sequence,
+         "definitions": " / ".join(senses) if senses else "No definition"}
+        for kanji, reading, sequence, senses in rows
+    ]
+
+
+def natural_key(row):
+    return json.dumps([row["kanji"], row["reading"], row["sequence"]], ensure_ascii=False)
+
+
+def file_checksum(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bank_number(file_name):
+    match = re.search(r"(\d+)", file_name)
+    return int(match.group(1)) if match else 0
+
+
+def upsert_statement(table, key_columns, dialect_name):
+    """INSERT ... ON CONFLICT DO UPDATE, pour SQLite comme pour PostgreSQL."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    updates = {c.name: stmt.excluded[c.name] for c in table.columns if c.name not in key_columns and not c.primary_key}
+    return stmt.on_conflict_do_update(index_elements=key_columns, set_=updates)
+
+
+def rebuild_variants(conn, batch_size=BATCH_SIZE):
+    """Recalcule toutes les graphies de recherche depuis la table `dictionary`."""
+    start = time.perf_counter()
+    conn.execute(delete(DictionaryVariant))
+    insert = DictionaryVariant.__table__.insert()
+    entries = conn.execute(
+        select(DictionaryEntry.id, DictionaryEntry.kanji, DictionaryEntry.reading)
+        .execution_options(yield_per=batch_size)
+    )
+    # Lecture en flux et écriture par lots : la table n'est jamais entièrement en mémoire
+    total, batch = 0, []
+    for entry_id, kanji, reading in entries:
+        for variant, priority in entry_variants(kanji, reading).items():
+            batch.append({"variant": variant, "entry_id": entry_id, "priority": priority})
+        if len(batch) >= batch_size:
+            conn.execute(insert, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert, batch)
+        total += len(batch)
+    print(f"Graphies recalculées : {total} en {time.perf_counter() - start:.1f} s")
+
+
+def purge_unnumbered(conn):
+    """
+    Supprime les entrées sans numéro de séquence, laissées par l'import d'avant la clé
+    naturelle : l'upsert ne les retrouve jamais, elles doubleraient chaque mot.
+    """
+    purged = conn.execute(delete(DictionaryEntry).where(DictionaryEntry.sequence.is_(None))).rowcount
+    if purged:
+        print(f"Entrées sans numéro de séquence supprimées : {purged}")
+
+
+def bump_version(conn):
+    """Incrémente la version du dictionnaire surveillée par les workers de l'API."""
+    result = conn.execute(update(DictionaryVersion).values(version=DictionaryVersion.version + 1))
+    if result.rowcount == 0:
+        conn.execute(DictionaryVersion.__table__.insert(), [{"id": 1, "version": 1}])
+
+
+def import_yomitan_json(data_dir="data/", changed_only=False, workers=None, batch_size=BATCH_SIZE):
+    files = sorted((f for f in os.listdir(data_dir) if f.startswith('term_bank')), key=bank_number)
     if not files:
-        print("Aucun fichier trouvé.")
+        print("Aucun fichier term_bank_*.json trouvé dans le dossier data/")
         return
 
-    print(f"Début de l'importation de {len(files)} fichiers...")
+    paths = [os.path.join(data_dir, f) for f in files]
+    checksums = {f: file_checksum(p) for f, p in zip(files, paths)}
+    with engine.connect() as conn:
+        known = {row.file_name: row for row in conn.execute(select(DictionaryBank))}
 
-    for file_name in files:
-        file_path = os.path.join(data_dir, file_name)
-        with open(file_path, 'r', encoding='utf-8') as f:
-            try:
-                entries = json.load(f)
-                entries_to_add = []
-                for entry in entries:
-                    # Index 0: Kanji, Index 1: Reading, Index 5: Definitions
-                    kanji = str(entry[0])
-                    reading = str(entry[1])
-                    raw_definitions = entry[5]
-                    
-                    # On utilise notre nouvelle fonction d'extraction
-                    clean_defs = []
-                    if isinstance(raw_definitions, list):
-                        for item in raw_definitions:
-                            text = extract_text(item).strip()
-                            if text:
-                                clean_defs.append(text)
-                    
-                    definitions_str = " / ".join(clean_defs) if clean_defs else "No definition"
-
-                    entries_to_add.append(DictionaryEntry(
-                        kanji=kanji,
-                        reading=reading,
-                        definitions=definitions_str
-                    ))
-
-                db.bulk_save_objects(entries_to_add)
-                db.commit()
-                print(f"Importé avec succès : {file_name}")
-            except Exception as e:
-                print(f"Erreur sur le fichier {file_name}: {e}")
-                db.rollback()
-
-    db.close()
-    print("Importation terminée !")
+    selected = [
+        i for i, f in enumerate(files)
+        if not changed_only or f not in known or known[f].checksum != checksums[f]
+    ]
+    if not selected:
+        print("Aucun fichier modifié depuis le dernier import.")
+        return
+    print(f"Début de l'importation de {len(selected)}/{len(files)} fichiers...")
+
+    entry_upsert = upsert_statement(DictionaryEntry.__table__, ["kanji", "reading", "sequence"], engine.dialect.name)
+    bank_upsert = upsert_statement(DictionaryBank.__table__, ["file_name"], engine.dialect.name)
+
+    start = time.perf_counter()
+    total = 0
+    last_keys = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool, engine.begin() as conn:
+        purge_unnumbered(conn)
+        jobs = [pool.submit(parse_bank, paths[i], paths[i + 1] if i + 1 < len(paths) else None) for i in selected]
+        for i, job in zip(selected, jobs):
+            rows = job.result()
+            file_name = files[i]
+
+            # Un groupe commencé dans le fichier précédent a déjà été écrit avec celui-ci
+            last_key = natural_key(rows[-1]) if rows else None
+            previous_key = None
+            if i > 0:
+                previous = files[i - 1]
+                previous_key = last_keys.get(previous, known[previous].last_key if previous in known else None)
+            if rows and previous_key == natural_key(rows[0]):
+                rows = rows[1:]
+            last_keys[file_name] = last_key
+
+            for offset in range(0, len(rows), batch_size):
+                conn.execute(entry_upsert, rows[offset:offset + batch_size])
+            conn.execute(bank_upsert, [{
+                "file_name": file_name, "checksum": checksums[file_name],
+                "entries": len(rows), "last_key": last_key,
+            }])
+
+            total += len(rows)
+            elapsed = time.perf_counter() - start
+            print(f"Importé : {file_name} ({len(rows)} entrées, {total / elapsed:.0f} entrées/s)")
+
+        rebuild_variants(conn, batch_size)
+        bump_version(conn)
+
+    elapsed = time.perf_counter() - start
+    print(f"Importation terminée : {total} entrées en {elapsed:.1f} s ({total / elapsed:.0f} entrées/s)")
+
+
+def notify_api_reload():
+    """Demande à l'API en cours d'exécution de reconstruire son index du dictionnaire."""
+    if not settings.dictionary_reload_url:
+        return
+    try:
+        requests.post(settings.dictionary_reload_url, timeout=10).raise_for_status()
+        print("Reconstruction de l'index de l'API demandée.")
+    except requests.RequestException as e:
+        print(f"Impossible de recharger l'index de l'API : {e}")
 
 
 if __name__ == "__main__":
-    import_yomitan_json()
+    parser = argparse.ArgumentParser(description="Import des term_bank Yomitan dans la table dictionary")
+    parser.add_argument("--data-dir", default="data/")
+    parser.add_argument("--changed-only", action="store_true", help="ignore les fichiers dont le sha256 n'a pas changé")
+    parser.add_argument("--workers", type=int, default=None, help="processus de parsing (défaut : nombre de cœurs)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--variants-only", action="store_true", help="recalcule seulement dictionary_variants")
+    args = parser.parse_args()
+
+    if args.variants_only:
+        with engine.begin() as conn:
+            rebuild_variants(conn, args.batch_size)
+            bump_version(conn)
+    else:
+        import_yomitan_json(args.data_dir, args.changed_only, args.workers, args.batch_size)
+    notify_api_reload()
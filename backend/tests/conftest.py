@@ -0,0 +1,54 @@
+import asyncio
+import os
+import tempfile
+
+# La configuration est lue à l'import de l'application : la base de test doit être choisie
+# avant. TEST_DATABASE_URL permet de lancer la suite sur PostgreSQL (tables de cartes vidées).
+_TMP_DIR = tempfile.mkdtemp(prefix="japanese-tests-")
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+)
+os.environ["TOKENIZER_WORKERS"] = "0"
+os.environ["DICTIONARY_INDEX_ENABLED"] = "false"
+
+import pytest
+from sqlalchemy import delete
+
+from app.db.base import SessionLocal, async_engine
+from app.db.init_db import init_models
+from app.models.card import CardContext, UserCard
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    init_models()
+
+
+@pytest.fixture
+def run():
+    """Exécute une coroutine dans sa propre boucle, puis ferme les connexions qui y sont liées."""
+    def runner(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(main())
+    return runner
+
+
+@pytest.fixture
+def make_card():
+    """Crée une carte (interval 1, facilité 2.5 par défaut) et retourne son id ; tout est supprimé après le test."""
+    def factory(**values):
+        values = {"word_text": "猫", "lemma": "猫", "interval": 1, "ease_factor": 2.5, **values}
+        with SessionLocal() as db:
+            card = UserCard(**values)
+            db.add(card)
+            db.commit()
+            return card.id
+    yield factory
+    with SessionLocal() as db:
+        db.execute(delete(CardContext))
+        db.execute(delete(UserCard))
+        db.commit()
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from alembic.script import ScriptDirectory
+
+from app.db.init_db import alembic_config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_in_backend(database_path, *args):
+    """
+    Lance une commande Python dans un processus séparé : le moteur de l'application est lié
+    à DATABASE_URL dès l'import, celui des tests pointe déjà vers la base de test.
+    """
+    env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{database_path}"}
+    subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+
+
+@pytest.mark.parametrize("stamped", [True, False], ids=["at-0001", "before-migrations"])
+def test_upgrade_from_legacy_database(tmp_path, stamped):
+    """
+    Base de la version d'origine avec un dictionnaire importé sans numéro de séquence et une
+    carte SM-2 : marquée 0001, ou créée par create_all (sans table alembic_version).
+    """
+    database_path = tmp_path / "legacy.db"
+    run_in_backend(database_path, "-m", "alembic", "upgrade", "0001")
+    with sqlite3.connect(database_path) as conn:
+        if not stamped:
+            conn.execute("DROP TABLE alembic_version")
+        conn.executemany(
+            "INSERT INTO dictionary (kanji, reading, definitions) VALUES (?, ?, ?)",
+            [("猫", "ねこ", "cat"), ("犬", "いぬ", "dog"), ("猫", "ねこ", "cat")],
+        )
+        conn.execute(
+            "INSERT INTO user_cards (word_text, lemma, interval, ease_factor, next_review_date) "
+            "VALUES ('猫', '猫', 6, 2.35, '2026-03-01 09:00:00')"
+        )
+
+    run_in_backend(database_path, "-m", "app.db.init_db")
+
+    head = ScriptDirectory.from_config(alembic_config(configure_logger=False)).get_current_head()
+    with sqlite3.connect(database_path) as conn:
+        assert conn.execute("SELECT version_num FROM alembic_version").fetchall() == [(head,)]
+        # Lignes sans clé naturelle supprimées : le prochain import les recrée une seule fois
+        assert conn.execute("SELECT count(*) FROM dictionary").fetchone() == (0,)
+        card_columns = {row[1] for row in conn.execute("PRAGMA table_info(user_cards)")}
+        assert {"stability", "difficulty"} <= card_columns
+        assert conn.execute(
+            "SELECT interval, ease_factor, stability FROM user_cards WHERE lemma = '猫'"
+        ).fetchall() == [(6, 2.35, None)]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"dictionary_banks", "dictionary_variants", "documents", "dictionary_version"} <= tables
+
+
+def test_upgrade_is_repeatable(tmp_path):
+    database_path = tmp_path / "fresh.db"
+    run_in_backend(database_path, "-m", "app.db.init_db")
+    run_in_backend(database_path, "-m", "app.db.init_db")
+
+    head = ScriptDirectory.from_config(alembic_config(configure_logger=False)).get_current_head()
+    with sqlite3.connect(database_path) as conn:
+        assert conn.execute("SELECT version_num FROM alembic_version").fetchall() == [(head,)]
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app.db.base import AsyncSessionLocal, async_engine
+from app.models.card import UserCard
+from app.services.review_submission import apply_review_batch
+from app.services.scheduler import SM2Scheduler
+
+
+def review(card_id, quality, reviewed_at):
+    return SimpleNamespace(card_id=card_id, quality=quality, reviewed_at=reviewed_at)
+
+
+async def submit(reviews, scheduler=None):
+    async with AsyncSessionLocal() as db:
+        return await apply_review_batch(db, reviews, scheduler or SM2Scheduler())
+
+
+async def card_states(card_ids):
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(UserCard.id, UserCard.interval, UserCard.ease_factor, UserCard.last_review_date,
+                   UserCard.next_review_date)
+            .where(UserCard.id.in_(card_ids))
+            .order_by(UserCard.id)
+        )
+        return [tuple(row) for row in rows]
+
+
+def test_replayed_batch_is_ignored(run, make_card):
+    start = datetime.now() - timedelta(hours=2)
+    cards = [make_card() for _ in range(3)]
+    batch = [
+        review(cards[0], "easy", start),
+        review(cards[0], "easy", start + timedelta(minutes=1)),
+        review(cards[1], "hard", start),
+        review(cards[2], "forgot", start),
+    ]
+
+    first = run(submit(batch))
+    after_first = run(card_states(cards))
+    replay = run(submit(list(reversed(batch))))
+
+    assert first == {"applied": 4, "skipped": 0, "missing": [], "future": []}
+    assert replay == {"applied": 0, "skipped": 4, "missing": [], "future": []}
+    assert run(card_states(cards)) == after_first
+    # 1 -> 2 (facilité 2.65) -> 5
+    assert after_first[0][1] == 5
+
+
+def test_replay_applies_only_newer_reviews(run, make_card):
+    start = datetime.now() - timedelta(hours=2)
+    card = make_card()
+    run(submit([review(card, "easy", start)]))
+
+    result = run(submit([review(card, "easy", start), review(card, "easy", start + timedelta(minutes=5))]))
+
+    assert result["applied"] == 1 and result["skipped"] == 1
+    [(_, interval, _, last_review, _)] = run(card_states([card]))
+    assert interval == 5
+    assert last_review.replace(tzinfo=None) == start + timedelta(minutes=5)
+
+
+def test_concurrent_batches_do_not_lose_reviews(run, make_card):
+    """
+    Pendant que le lot A (r1) calcule, le lot B (r1 puis r2, rejeu d'une file hors ligne) est
+    soumis sur une autre connexion. Sans verrou, A écrivait un état lu avant B et r2 était perdu.
+    """
+    r1 = datetime.now() - timedelta(hours=1)
+    r2 = r1 + timedelta(minutes=1)
+    card = make_card()
+    results = {}
+
+    def batch_b():
+        async def main():
+            try:
+                results["b"] = await submit([review(card, "easy", r1), review(card, "easy", r2)])
+            finally:
+                await async_engine.dispose()
+        asyncio.run(main())
+
+    class SlowScheduler(SM2Scheduler):
+        thread = None
+
+        def review(self, states, qualities, reviewed_at):
+            # B démarre pendant le calcul de A ; A ne l'attend qu'une seconde (B doit attendre A)
+            self.thread = threading.Thread(target=batch_b)
+            self.thread.start()
+            self.thread.join(1.0)
+            return super().review(states, qualities, reviewed_at)
+
+    scheduler = SlowScheduler()
+    results["a"] = run(submit([review(card, "easy", r1)], scheduler))
+    scheduler.thread.join()
+
+    assert results["a"]["applied"] == 1
+    assert results["b"]["applied"] == 1 and results["b"]["skipped"] == 1
+    [(_, interval, _, last_review, _)] = run(card_states([card]))
+    assert last_review.replace(tzinfo=None) == r2
+    assert interval == 5
@@ -0,0 +1,109 @@
+import math
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.scheduler import CardStates, FSRSScheduler, SM2Scheduler
+from app.services.srs_algorithm import MAX_INTERVAL, calculate_next_review, calculate_next_reviews
+
+QUALITIES = np.array(["forgot", "hard", "easy"])
+NOW = datetime(2026, 3, 1, 9, 30)
+
+
+def random_rows(n: int, seed: int = 0):
+    """Cartes variées : neuves, SM-2 sans état FSRS (avec ou sans date de révision), FSRS."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        kind = i % 4
+        interval = int(rng.integers(1, 400)) if kind else 1
+        ease = round(float(rng.uniform(1.3, 3.5)), 2) if kind else 2.5
+        last_review = NOW - timedelta(days=float(rng.uniform(0, 2 * interval))) if kind >= 2 else None
+        rows.append(SimpleNamespace(
+            interval=interval,
+            ease_factor=ease,
+            stability=float(rng.uniform(0.5, 300)) if kind == 3 else None,
+            difficulty=float(rng.uniform(1, 10)) if kind == 3 else None,
+            last_review_date=last_review,
+            next_review_date=NOW - timedelta(days=float(rng.uniform(0, 30))),
+        ))
+    return rows, rng.choice(QUALITIES, n)
+
+
+def fsrs_review_scalar(w, row, quality, at, desired_retention=0.9):
+    """Une carte à la fois, formules FSRS v4.5 telles que publiées (référence du calcul vectorisé)."""
+    decay, factor = FSRSScheduler.DECAY, FSRSScheduler.FACTOR
+    grade = {"forgot": 1, "hard": 2, "easy": 3}[quality]
+
+    def initial_difficulty(g):
+        return min(max(w[4] - (g - 3) * w[5], 1), 10)
+
+    new = (
+        row.stability is None and row.last_review_date is None
+        and row.interval <= 1 and row.ease_factor == 2.5
+    )
+    if new:
+        stability, difficulty = w[grade - 1], initial_difficulty(grade)
+    else:
+        s = max(row.interval if row.stability is None else row.stability, 0.1)
+        d = min(max(10 - (row.ease_factor - 1.3) * 5, 1), 10) if row.difficulty is None else row.difficulty
+        last = row.last_review_date or row.next_review_date - timedelta(days=row.interval)
+        elapsed = max((at - last) / timedelta(days=1), 0.0)
+        r = (1 + factor * elapsed / s) ** decay
+        if grade == 1:
+            stability = w[11] * d ** -w[12] * ((s + 1) ** w[13] - 1) * math.exp(w[14] * (1 - r))
+        else:
+            stability = s * (
+                1 + math.exp(w[8]) * (11 - d) * s ** -w[9] * (math.exp(w[10] * (1 - r)) - 1)
+                * (w[15] if grade == 2 else 1)
+            )
+        difficulty = min(max(w[7] * initial_difficulty(3) + (1 - w[7]) * (d - w[6] * (grade - 3)), 1), 10)
+
+    interval = stability / factor * (desired_retention ** (1 / decay) - 1)
+    return min(max(round(interval), 1), MAX_INTERVAL), stability, difficulty
+
+
+def test_sm2_vectorized_matches_scalar():
+    rows, qualities = random_rows(2000)
+    intervals = np.array([r.interval for r in rows] + [MAX_INTERVAL - 1, MAX_INTERVAL])
+    eases = np.array([r.ease_factor for r in rows] + [3.0, 3.0])
+    qualities = np.concatenate([qualities, ["easy", "hard"]])
+
+    new_intervals, new_eases, due = calculate_next_reviews(intervals, eases, qualities, np.full(len(intervals), NOW))
+
+    for i in range(len(intervals)):
+        interval, ease, _ = calculate_next_review(int(intervals[i]), float(eases[i]), str(qualities[i]))
+        assert new_intervals[i] == interval
+        assert new_eases[i] == ease
+        assert due[i].item() == NOW + timedelta(days=interval)
+
+
+def test_fsrs_vectorized_matches_scalar():
+    rows, qualities = random_rows(2000, seed=1)
+    scheduler = FSRSScheduler()
+    at = NOW + timedelta(hours=6)
+
+    reviewed = scheduler.review(CardStates.from_rows(rows, NOW), qualities, np.full(len(rows), at))
+
+    for i, row in enumerate(rows):
+        interval, stability, difficulty = fsrs_review_scalar(scheduler.w, row, str(qualities[i]), at)
+        assert reviewed.interval[i] == interval
+        assert reviewed.stability[i] == pytest.approx(stability, rel=1e-9)
+        assert reviewed.difficulty[i] == pytest.approx(difficulty, rel=1e-9)
+        assert reviewed.due[i].item() == at + timedelta(days=interval)
+
+
+@pytest.mark.parametrize("scheduler", [SM2Scheduler(), FSRSScheduler()], ids=lambda s: s.name)
+def test_batch_review_matches_card_by_card(scheduler):
+    rows, qualities = random_rows(200, seed=2)
+    states = CardStates.from_rows(rows, NOW)
+    at = np.full(len(rows), NOW, dtype="datetime64[us]")
+
+    batch = scheduler.review(states, qualities, at)
+
+    for i in range(len(rows)):
+        single = scheduler.review(states.take([i]), qualities[i:i + 1], at[i:i + 1])
+        for field in CardStates.__dataclass_fields__:
+            np.testing.assert_array_equal(getattr(single, field), getattr(batch, field)[i:i + 1])
@@ -11,9 +11,32 @@ const Reader = ({ API_URL }) => {
 
   const analyzeText = async () => {
     setIsAnalyzing(true);
+    setTokens([]);
     try {
-      const response = await axios.post(`${API_URL}/api/test-nlp`, { text: inputText });
-      setTokens(response.data.tokens);
+      // Analyse en flux (NDJSON) : les tokens s'affichent au fur et à mesure des lots
+      const response = await fetch(`${API_URL}/api/test-nlp/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ text: inputText }),
+      });
+      if (!response.ok) throw new Error(response.statusText);
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop(); // Ligne incomplète : on attend la suite
+        for (const line of lines) {
+          if (!line) continue;
+          const message = JSON.parse(line);
+          if (message.error) throw new Error(message.error);
+          if (message.tokens) setTokens(prev => [...prev, ...message.tokens]);
+        }
+      }
     } catch (error) {
       alert("Erreur");
     } finally {
@@ -2,21 +2,64 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { CheckCircle, XCircle, AlertCircle, RefreshCw } from 'lucide-react';
 
+// Taille des pages de la file de révision, et nombre de cartes restantes déclenchant le préchargement
+const PAGE_SIZE = 50;
+const PREFETCH_THRESHOLD = 10;
+
+// Résultats en attente d'envoi, conservés hors ligne et envoyés par lots
+const PENDING_KEY = "pendingReviews";
+const FLUSH_SIZE = 20;
+const loadPending = () => JSON.parse(localStorage.getItem(PENDING_KEY) || "[]");
+const savePending = (reviews) => localStorage.setItem(PENDING_KEY, JSON.stringify(reviews));
+// Identité d'un résultat : la même clé que le serveur utilise pour ignorer les doublons
+const reviewKey = (review) => `${review.card_id}|${review.reviewed_at}`;
+// Envois chaînés : un seul lot en vol à la fois, même si plusieurs notes le déclenchent
+let flushChain = Promise.resolve();
+
 const ReviewSession = ({ API_URL }) => {
   const [queue, setQueue] = useState([]);
   const [currentIndex, setCurrentIndex] = useState(0);
   const [showAnswer, setShowAnswer] = useState(false);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [prefetching, setPrefetching] = useState(false);
 
   useEffect(() => {
     fetchReviews();
   }, []);
 
+  const fetchPage = async (cursor) => {
+    const params = { limit: PAGE_SIZE };
+    if (cursor) params.cursor = cursor;
+    const response = await axios.get(`${API_URL}/api/reviews`, { params });
+    return response.data;
+  };
+
+  const sendPending = async () => {
+    const pending = loadPending();
+    if (pending.length === 0) return;
+    await axios.post(`${API_URL}/api/reviews/batch`, pending);
+    // Seuls les résultats envoyés sont retirés : ceux notés pendant l'envoi restent en file.
+    // Le serveur ignore les résultats déjà appliqués : un lot renvoyé deux fois est sans effet
+    const sent = new Set(pending.map(reviewKey));
+    savePending(loadPending().filter((review) => !sent.has(reviewKey(review))));
+  };
+
+  const flushReviews = () => {
+    // Attend la fin de l'envoi en cours (réussi ou non) avant de relire la file
+    flushChain = flushChain.catch(() => {}).then(sendPending);
+    return flushChain;
+  };
+
   const fetchReviews = async () => {
     setLoading(true);
     try {
-      const response = await axios.get(`${API_URL}/api/reviews`);
-      setQueue(response.data);
+      await flushReviews().catch((error) => console.error("Envoi des révisions différé", error));
+      const page = await fetchPage(null);
+      setQueue(page.items);
+      setNextCursor(page.next_cursor);
+      setCurrentIndex(0);
+      setShowAnswer(false);
     } catch (error) {
       console.error("Erreur lors du chargement des révisions", error);
     } finally {
@@ -24,26 +67,44 @@ const ReviewSession = ({ API_URL }) => {
     }
   };
 
-  const handleRate = async (quality) => {
+  // Précharge la page suivante pendant que l'utilisateur révise la page courante
+  useEffect(() => {
+    if (loading || prefetching || !nextCursor) return;
+    if (queue.length - currentIndex > PREFETCH_THRESHOLD) return;
+    setPrefetching(true);
+    fetchPage(nextCursor)
+      .then((page) => {
+        setQueue((prev) => [...prev, ...page.items]);
+        setNextCursor(page.next_cursor);
+      })
+      .catch((error) => {
+        console.error("Erreur lors du préchargement des révisions", error);
+        setNextCursor(null);
+      })
+      .finally(() => setPrefetching(false));
+  }, [currentIndex, queue.length, nextCursor, prefetching, loading]);
+
+  const handleRate = (quality) => {
     const currentCard = queue[currentIndex];
-    try {
-      await axios.post(`${API_URL}/api/reviews/${currentCard.id}?quality=${quality}`);
-      
-      // Passer à la carte suivante
-      if (currentIndex < queue.length - 1) {
-        setCurrentIndex(currentIndex + 1);
-        setShowAnswer(false);
-      } else {
-        setQueue([]); // Session terminée
-      }
-    } catch (error) {
-      alert("Erreur lors de la mise à jour du SRS");
+    const pending = [...loadPending(), { card_id: currentCard.id, quality, reviewed_at: new Date().toISOString() }];
+    savePending(pending);
+
+    const isLastCard = currentIndex + 1 >= queue.length && !nextCursor;
+    if (pending.length >= FLUSH_SIZE || isLastCard) {
+      flushReviews().catch((error) => console.error("Envoi des révisions différé", error));
     }
+
+    // Passer à la carte suivante (la session est terminée quand la file est épuisée)
+    setCurrentIndex(currentIndex + 1);
+    setShowAnswer(false);
   };
 
-  if (loading) return <div className="text-center p-10"><RefreshCw className="animate-spin mx-auto" /> Chargement...</div>;
+  const card = queue[currentIndex];
+
+  // Fin de la page courante alors que la suivante est encore en chargement
+  if (loading || (!card && (prefetching || nextCursor))) return <div className="text-center p-10"><RefreshCw className="animate-spin mx-auto" /> Chargement...</div>;
   
-  if (queue.length === 0) return (
+  if (!card) return (
     <div className="text-center p-10 bg-white rounded-2xl shadow-sm border">
       <CheckCircle className="text-emerald-500 w-16 h-16 mx-auto mb-4" />
       <h2 className="text-2xl font-bold">Félicitations !</h2>
@@ -52,12 +113,10 @@ const ReviewSession = ({ API_URL }) => {
     </div>
   );
 
-  const card = queue[currentIndex];
-
   return (
     <div className="max-w-xl mx-auto mt-10 p-4">
       <div className="mb-4 flex justify-between text-sm text-slate-400 font-medium">
-        <span>Progression : {currentIndex + 1} / {queue.length}</span>
+        <span>Progression : {currentIndex + 1} / {queue.length}{nextCursor ? "+" : ""}</span>
         <span>Mode Révision</span>
       </div>
 